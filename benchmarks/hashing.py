@@ -0,0 +1,60 @@
+import argparse
+import asyncio
+import statistics
+import time
+from src.utils.hashing import pwd_context
+from src.utils.hashing import PasswordHasher
+
+
+async def monitor_lag(interval: float, samples: list, stop: asyncio.Event):
+    # how late the loop wakes a coroutine that asked to sleep `interval`
+    while not stop.is_set():
+        started = time.perf_counter()
+        await asyncio.sleep(interval)
+        samples.append(time.perf_counter() - started - interval)
+
+
+async def login_storm(hasher: PasswordHasher, hashed: str, logins: int, concurrency: int) -> float:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def login():
+        async with semaphore:
+            assert await hasher.verify('password', hashed)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(login() for _ in range(logins)))
+    return time.perf_counter() - started
+
+
+async def run(offload: bool, hashed: str, args) -> None:
+    hasher = PasswordHasher(offload, args.workers, max_pending=args.logins)
+    if offload:
+        await hasher.verify('password', hashed)  # start the worker processes outside the measurement
+    samples, stop = [], asyncio.Event()
+    monitor = asyncio.create_task(monitor_lag(args.interval_ms / 1000, samples, stop))
+    await asyncio.sleep(0)
+    elapsed = await login_storm(hasher, hashed, args.logins, args.concurrency)
+    stop.set()
+    await monitor
+    hasher.close()
+    samples.sort()
+    p99 = samples[min(len(samples) - 1, int(len(samples) * 0.99))] if samples else 0.0
+    print(f'{"offloaded" if offload else "inline":>9}: {args.logins / elapsed:7.1f} logins/s, event loop lag '
+          f'p50={statistics.median(samples or [0]) * 1000:6.2f}ms p99={p99 * 1000:7.2f}ms max={max(samples or [0]) * 1000:7.2f}ms')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Event loop lag during a login storm, with and without the hashing pool')
+    parser.add_argument('--logins', type=int, default=32)
+    parser.add_argument('--concurrency', type=int, default=16)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--interval-ms', type=float, default=5.0, help='lag probe period')
+    args = parser.parse_args()
+
+    hashed = pwd_context.hash('password')
+    for offload in (False, True):
+        asyncio.run(run(offload, hashed, args))
+
+
+if __name__ == '__main__':
+    main()
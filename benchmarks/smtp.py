@@ -0,0 +1,99 @@
+import argparse
+import asyncio
+import smtplib
+import threading
+import time
+from src.utils.smtp import SMTPClient, SMTPConnectionPool
+
+
+class StandInSMTPServer:
+    # minimal SMTP responder in the spirit of aiosmtpd's Sink handler, with an artificial per-reply delay
+
+    def __init__(self, host: str, port: int, latency: float):
+        self.host = host
+        self.port = port
+        self.latency = latency
+        self.received = 0
+        self.sessions = 0
+        self._loop = asyncio.new_event_loop()
+        self._ready = threading.Event()
+
+    def start(self):
+        threading.Thread(target=self._run, daemon=True).start()
+        self._ready.wait()
+
+    def _run(self):
+        asyncio.set_event_loop(self._loop)
+        server = self._loop.run_until_complete(asyncio.start_server(self._handle, self.host, self.port))
+        self.port = server.sockets[0].getsockname()[1]
+        self._ready.set()
+        self._loop.run_forever()
+
+    async def _reply(self, writer, line: str):
+        await asyncio.sleep(self.latency)
+        writer.write(line.encode() + b'\r\n')
+        await writer.drain()
+
+    async def _handle(self, reader, writer):
+        self.sessions += 1
+        await self._reply(writer, '220 stand-in ESMTP')
+        while line := await reader.readline():
+            command = line.decode().strip().upper()
+            if command.startswith('EHLO'):
+                await self._reply(writer, '250-stand-in\r\n250 AUTH PLAIN LOGIN')
+            elif command.startswith('AUTH'):
+                await self._reply(writer, '235 2.7.0 Authentication successful')
+            elif command == 'DATA':
+                await self._reply(writer, '354 End data with <CR><LF>.<CR><LF>')
+                while (await reader.readline()) != b'.\r\n':
+                    pass
+                self.received += 1
+                await self._reply(writer, '250 OK')
+            elif command == 'QUIT':
+                await self._reply(writer, '221 Bye')
+                break
+            else:
+                await self._reply(writer, '250 OK')
+        writer.close()
+
+
+def send_unpooled(host, port, count):
+    # the pre-pool behaviour: one connection, login and quit per message
+    for _ in range(count):
+        server = smtplib.SMTP(host, port, local_hostname='localhost')
+        server.login('bench', 'bench')
+        server.sendmail('bench@example.com', 'to@example.com', 'Subject: bench\r\n\r\nhello')
+        server.quit()
+
+
+def send_pooled(host, port, count, max_messages):
+    pool = SMTPConnectionPool(host, port, 'bench', 'bench', False, size=1, max_messages=max_messages,
+                              max_age=300, health_check_after=10, timeout=30)
+    client = SMTPClient(pool)
+    for _ in range(count):
+        client.send_email('to@example.com', 'bench', 'hello')
+    pool.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='SMTP throughput with and without connection pooling')
+    parser.add_argument('--messages', type=int, default=200)
+    parser.add_argument('--latency-ms', type=float, default=2.0, help='artificial delay before every server reply')
+    parser.add_argument('--max-messages', type=int, default=100, help='pooled connection recycle threshold')
+    args = parser.parse_args()
+
+    server = StandInSMTPServer('127.0.0.1', 0, args.latency_ms / 1000)
+    server.start()
+
+    for name, run in (('unpooled', lambda: send_unpooled(server.host, server.port, args.messages)),
+                      ('pooled', lambda: send_pooled(server.host, server.port, args.messages, args.max_messages))):
+        sessions, received = server.sessions, server.received
+        started = time.perf_counter()
+        run()
+        elapsed = time.perf_counter() - started
+        print(f'{name:>8}: {args.messages / elapsed:8.1f} msg/s, '
+              f'{server.sessions - sessions} sessions for {server.received - received} messages')
+
+
+if __name__ == '__main__':
+    main()
@@ -3,10 +3,12 @@ import os
 from celery import Celery
 from dotenv import load_dotenv
 from fastapi.security import OAuth2PasswordBearer
-from passlib.context import CryptContext
+import asyncio
 from loguru import logger
 import sys
 from jinja2 import Environment, FileSystemLoader
+from markupsafe import Markup, escape
+from typing import Dict, List, Optional, Tuple
 import os
 from collections.abc import AsyncIterator
 from contextlib import asynccontextmanager
@@ -22,8 +24,108 @@ load_dotenv()
 class DatabaseConfig:
     DATABASE_URL: str = os.getenv("DATABASE_URL", "sqlite+aiosqlite:///./default.db")
     SYNC_DATABASE_URL: str = os.getenv("SYNC_DATABASE_URL", "sqlite:///./default.db")
+    # async URLs of read replicas, comma separated
+    REPLICA_URLS: List[str] = [url.strip() for url in os.getenv("DATABASE_REPLICA_URLS", "").split(",") if url.strip()]
 
-pwd_context = CryptContext(schemes=["sha256_crypt"], deprecated="auto")
+class EngineConfig:
+    # auto picks 'sqlite' or 'server' from the URL, 'defaults' leaves everything to SQLAlchemy
+    profile: str = os.getenv("DATABASE_ENGINE_PROFILE", "auto")
+    profiles: Dict[str, dict] = {
+        'defaults': {},
+        'sqlite': {
+            'pool_size': 5,
+            'max_overflow': 10,
+            'pool_timeout': 30,
+            'statement_cache_size': 256,
+            'pragmas': {
+                # readers no longer block on the writer, and commits skip the per-transaction fsync
+                'journal_mode': 'WAL',
+                'synchronous': 'NORMAL',
+                'mmap_size': 256 * 1024 * 1024,
+                'cache_size': -64 * 1024,
+                'busy_timeout': 5000,
+                'temp_store': 'MEMORY',
+            },
+        },
+        'server': {
+            'pool_size': 10,
+            'max_overflow': 20,
+            'pool_timeout': 30,
+            'pool_recycle': 1800,
+            'pool_pre_ping': True,
+            'statement_cache_size': 500,
+        },
+    }
+    # per-deployment sizing on top of the profile
+    overrides: Dict[str, object] = {
+        name: cast(os.environ[env])
+        for name, env, cast in (
+            ('pool_size', 'DATABASE_POOL_SIZE', int),
+            ('max_overflow', 'DATABASE_MAX_OVERFLOW', int),
+            ('pool_timeout', 'DATABASE_POOL_TIMEOUT', float),
+            ('pool_recycle', 'DATABASE_POOL_RECYCLE', int),
+            ('statement_cache_size', 'DATABASE_STATEMENT_CACHE_SIZE', int),
+        )
+        if os.getenv(env)
+    }
+
+class PaginationConfig:
+    default_limit: int = int(os.getenv("PAGE_DEFAULT_LIMIT", 50))
+    max_limit: int = int(os.getenv("PAGE_MAX_LIMIT", 200))
+
+class ProjectionConfig:
+    version_backend: str = os.getenv("PROJECTION_VERSION_BACKEND", "redis")
+    redis_url: str = os.getenv("PROJECTION_REDIS_URL", "redis://localhost")
+
+class CacheConfig:
+    redis_url: str = os.getenv("CACHE_REDIS_URL", "redis://localhost")
+    tag_backend: str = os.getenv("CACHE_TAG_BACKEND", "redis")
+    # entries are invalidated by tag on writes, the TTL only bounds memory
+    catalog_ttl: int = int(os.getenv("CACHE_CATALOG_TTL", 6 * 60 * 60))
+    # browsers cannot see tag invalidations, so tagged responses are revalidated via ETag; 0 sends no-cache
+    client_max_age: int = int(os.getenv("CACHE_CLIENT_MAX_AGE", 0))
+    # a tag bump that still fails after the retries is replayed in the background every replay_interval seconds
+    invalidate_retries: int = int(os.getenv("CACHE_INVALIDATE_RETRIES", 2))
+    invalidate_retry_delay: float = float(os.getenv("CACHE_INVALIDATE_RETRY_DELAY", 0.05))
+    invalidate_replay_interval: float = float(os.getenv("CACHE_INVALIDATE_REPLAY_INTERVAL", 1.0))
+    near_enabled: bool = os.getenv("CACHE_NEAR_ENABLED", "True").lower() in ['true', '1', 'yes']
+    near_max_entries: int = int(os.getenv("CACHE_NEAR_MAX_ENTRIES", 10_000))
+    near_max_bytes: int = int(os.getenv("CACHE_NEAR_MAX_BYTES", 64 * 1024 * 1024))
+    # how long a worker trusts its copy of a tag version without hearing from the invalidation channel
+    near_tag_ttl: float = float(os.getenv("CACHE_NEAR_TAG_TTL", 30))
+    invalidation_channel: str = os.getenv("CACHE_INVALIDATION_CHANNEL", "cache-invalidation")
+    # a miss holds the recompute lock this long; other processes wait up to lock_wait for its result
+    lock_timeout: float = float(os.getenv("CACHE_LOCK_TIMEOUT", 10))
+    lock_wait: float = float(os.getenv("CACHE_LOCK_WAIT", 5))
+    lock_poll_interval: float = float(os.getenv("CACHE_LOCK_POLL_INTERVAL", 0.05))
+    early_refresh_beta: float = float(os.getenv("CACHE_EARLY_REFRESH_BETA", 1.0))
+    # raw cached bodies at least this large are stored gzipped, 0 disables compression
+    compress_min_bytes: int = int(os.getenv("CACHE_COMPRESS_MIN_BYTES", 1024))
+    compress_level: int = int(os.getenv("CACHE_COMPRESS_LEVEL", 5))
+
+class SkillIngestionConfig:
+    # titles -> ids a worker keeps to skip the upsert for skills it has already seen
+    known_cache_size: int = int(os.getenv("SKILL_KNOWN_CACHE_SIZE", 100_000))
+
+class SkillIndexConfig:
+    enabled: bool = os.getenv("SKILL_INDEX_ENABLED", "False").lower() in ['true', '1', 'yes']
+    max_hydrate_ids: int = int(os.getenv("SKILL_INDEX_MAX_HYDRATE_IDS", 5000))
+
+class MatchingConfig:
+    enabled: bool = os.getenv("MATCHING_ENABLED", "False").lower() in ['true', '1', 'yes']
+    max_k: int = int(os.getenv("MATCHING_MAX_K", 100))
+    experience_cap: int = int(os.getenv("MATCHING_EXPERIENCE_CAP", 20))
+    experience_weight: float = float(os.getenv("MATCHING_EXPERIENCE_WEIGHT", 0.5))
+
+class HashingConfig:
+    scheme: str = os.getenv("PASSWORD_HASH_SCHEME", "bcrypt")
+    rounds: int = int(os.getenv("PASSWORD_HASH_ROUNDS", 12 if scheme == "bcrypt" else 535000))
+    # when set, rounds are calibrated at startup to take about this long per hash, overriding PASSWORD_HASH_ROUNDS
+    target_ms: float = float(os.getenv("PASSWORD_HASH_TARGET_MS", 0))
+    offload: bool = os.getenv("PASSWORD_HASH_OFFLOAD", "True").lower() in ['true', '1', 'yes']
+    workers: int = int(os.getenv("PASSWORD_HASH_WORKERS", os.cpu_count() or 1))
+    # hashes queued or running per web worker before new ones are refused with 503
+    max_pending: int = int(os.getenv("PASSWORD_HASH_MAX_PENDING", 8 * (os.cpu_count() or 1)))
 
 logger.remove()
 
@@ -38,12 +140,29 @@ celery = Celery(
 
 celery.autodiscover_tasks(['src.workers.tasks'])
 
+class OutboxConfig:
+    enabled: bool = os.getenv("OUTBOX_RELAY_ENABLED", "True").lower() in ['true', '1', 'yes']
+    batch_size: int = int(os.getenv("OUTBOX_BATCH_SIZE", 100))
+    interval: float = float(os.getenv("OUTBOX_POLL_INTERVAL", 1.0))
+    lease_seconds: int = int(os.getenv("OUTBOX_LEASE_SECONDS", 30))
+    # after this many failed publishes a message is parked, left in the table but never claimed again
+    max_attempts: int = int(os.getenv("OUTBOX_MAX_ATTEMPTS", 10))
+    # wait this long after a wakeup so registration bursts land in one batch
+    linger: float = float(os.getenv("OUTBOX_LINGER", 0.2))
+    batch_retry_delay: int = int(os.getenv("OUTBOX_BATCH_RETRY_DELAY", 60))
+    batch_max_retries: int = int(os.getenv("OUTBOX_BATCH_MAX_RETRIES", 3))
+
 class SMTPConfig:
     smtp_host = os.getenv('SMTP_HOST', 'smtp.yandex.ru')
     smtp_port = int(os.getenv('SMTP_PORT', 587))
     smtp_user = os.getenv('SMTP_USER', 'yuukich1')
     smtp_pass = os.getenv('SMTP_PASS', 'password')
     smtp_use_tls = os.getenv('SMTP_USE_TLS', 'True').lower() in ['true', '1', 'yes']
+    smtp_pool_size = int(os.getenv('SMTP_POOL_SIZE', 2))
+    smtp_max_messages = int(os.getenv('SMTP_MAX_MESSAGES', 100))
+    smtp_max_age = float(os.getenv('SMTP_MAX_AGE', 300))
+    smtp_health_check_after = float(os.getenv('SMTP_HEALTH_CHECK_AFTER', 10))
+    smtp_timeout = float(os.getenv('SMTP_TIMEOUT', 30))
 
 
 TEMPLATE_DIR = os.path.join(os.path.dirname(__file__), "templates")
@@ -59,6 +178,28 @@ def render_email(template_name, **kwargs):
     return template.render(**kwargs)
 
 
+def render_email_batch(template_name, contexts: List[dict]) -> List[str]:
+    # render once per distinct set of context keys with placeholder values, then substitute escaped values
+    template = env.get_template(f"/email/{template_name}")
+    skeletons: Dict[Tuple[str, ...], Optional[str]] = {}
+    rendered = []
+    for context in contexts:
+        keys = tuple(sorted(context))
+        if keys not in skeletons:
+            skeleton = template.render(**{key: Markup(f"\x00{key}\x00") for key in keys})
+            # a filter applied to a variable would mangle its placeholder, so such shapes render per context
+            skeletons[keys] = skeleton if all(f"\x00{key}\x00" in skeleton for key in keys) else None
+        skeleton = skeletons[keys]
+        if skeleton is None:
+            rendered.append(template.render(**context))
+            continue
+        html = skeleton
+        for key in keys:
+            html = html.replace(f"\x00{key}\x00", str(escape(context[key])))
+        rendered.append(html)
+    return rendered
+
+
 class SecurityConfig:
     secret_key = os.getenv('SECRET_KEY', 'supersecretkeydefault')
     algorithm = os.getenv('ALGORITHM', 'HS256')
@@ -67,21 +208,78 @@ class SecurityConfig:
     exp = timedelta(hours=2)
     exp_refresh = timedelta(days=7)
     activation_url = os.getenv('ACTIVATION_URL', 'http://localhost:8000/api/auth/activate')
+    # verified access tokens kept per worker until they expire
+    token_cache_size = int(os.getenv('TOKEN_CACHE_SIZE', 10_000))
+
+class ReplicaConfig:
+    health_interval: float = float(os.getenv("REPLICA_HEALTH_INTERVAL", 5))
+    health_timeout: float = float(os.getenv("REPLICA_HEALTH_TIMEOUT", 2))
+    # after writing, the writer's reads and the affected cache tags go to the primary for this long
+    read_your_writes: float = float(os.getenv("REPLICA_READ_YOUR_WRITES", 5))
+    max_tracked_scopes: int = int(os.getenv("REPLICA_MAX_TRACKED_SCOPES", 100_000))
+
+class RevocationConfig:
+    backend: str = os.getenv("REVOCATION_BACKEND", "redis")
+    redis_url: str = os.getenv("REVOCATION_REDIS_URL", CacheConfig.redis_url)
+    # sized for the revocations alive at once, the filter grows on sync if there are more
+    bloom_capacity: int = int(os.getenv("REVOCATION_BLOOM_CAPACITY", 100_000))
+    bloom_error_rate: float = float(os.getenv("REVOCATION_BLOOM_ERROR_RATE", 0.01))
+    sync_interval: float = float(os.getenv("REVOCATION_SYNC_INTERVAL", 5))
 
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
 @asynccontextmanager
 async def lifespan(_: FastAPI) -> AsyncIterator[None]:
     logger.info("Application startup: initializing Redis cache")
+    from src.utils.near_cache import cache_bus
+    from src.utils.revocation import token_revocations
+    from src.utils.replicas import replica_router
+    from src.utils.cache_tags import tag_invalidator
+    # carries cache tag invalidations, token revocations and write scopes between workers
+    await cache_bus.start()
+    token_revocations.start()
+    replica_router.start()
+    tag_invalidator.start()
     try:
-        redis = aioredis.from_url("redis://localhost")
-        FastAPICache.init(RedisBackend(redis), prefix="fastapi-cache")
+        redis = aioredis.from_url(CacheConfig.redis_url)
+        backend = RedisBackend(redis)
+        if CacheConfig.near_enabled:
+            from src.utils.near_cache import TwoTierBackend, near_cache
+            backend = TwoTierBackend(backend, near_cache, cache_bus)
+        FastAPICache.init(backend, prefix="fastapi-cache")
         logger.info("Redis cache initialized successfully")
     except Exception as e:
         logger.error(f"Failed to initialize Redis cache: {e}")
         logger.warning("Application will continue without cache")
+    if SkillIndexConfig.enabled or MatchingConfig.enabled:
+        from src.utils.skill_index import skill_index
+        from src.utils.matching import matching_engine
+        from src.utils.unit_of_work import ReadOnlyUnitOfWork
+        for projection in (skill_index, matching_engine):
+            if not projection.enabled:
+                continue
+            try:
+                async with ReadOnlyUnitOfWork() as uow:
+                    await projection.rebuild(uow)
+            except Exception as e:
+                logger.error(f"Failed to build {projection.name}: {e}")
+                logger.warning(f"{projection.name} will be rebuilt on first use")
+    if OutboxConfig.enabled:
+        from src.utils.outbox import outbox_relay
+        outbox_relay.start()
+    if HashingConfig.target_ms:
+        from src.utils.hashing import pwd_context, tune
+        await asyncio.to_thread(tune, pwd_context, HashingConfig.target_ms)
     logger.info("Application startup completed")
     yield
     logger.info("Application shutdown: cleaning up resources")
+    from src.utils.hashing import password_hasher
+    password_hasher.close()
+    await token_revocations.stop()
+    await replica_router.stop()
+    await tag_invalidator.stop()
+    await cache_bus.stop()
+    if OutboxConfig.enabled:
+        await outbox_relay.stop()
 
 limiter = Limiter(key_func=get_remote_address)
\ No newline at end of file
@@ -1,9 +1,10 @@
-from sqlalchemy import create_engine
-from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, async_sessionmaker
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import sessionmaker
 from src.config import DatabaseConfig
+from src.utils.engines import build_async_engine, build_sync_engine, pool_stats
 
-async_engine = create_async_engine(DatabaseConfig.DATABASE_URL, echo=False)
+async_engine = build_async_engine(DatabaseConfig.DATABASE_URL)
+pool_stats.register('primary', async_engine)
 
 async_session_maker = async_sessionmaker(
     bind=async_engine,
@@ -11,5 +12,9 @@ async_session_maker = async_sessionmaker(
     class_=AsyncSession
 )
 
-sync_engine = create_engine(DatabaseConfig.SYNC_DATABASE_URL, echo=False)
-SyncSession = sessionmaker(bind=sync_engine)
\ No newline at end of file
+replica_engines = [build_async_engine(url) for url in DatabaseConfig.REPLICA_URLS]
+for number, engine in enumerate(replica_engines, 1):
+    pool_stats.register(f'replica{number}', engine)
+
+sync_engine = build_sync_engine(DatabaseConfig.SYNC_DATABASE_URL)
+SyncSession = sessionmaker(bind=sync_engine)
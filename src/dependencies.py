@@ -1,8 +1,9 @@
 from typing import Annotated
 from fastapi import Depends
-from src.utils.unit_of_work import UnitOfWork
+from src.utils.unit_of_work import ReadOnlyUnitOfWork, UnitOfWork
 from src.service.auth import AuthService
 
 UOWdep = Annotated[UnitOfWork, Depends(UnitOfWork)]
 UserDep = Annotated[dict, Depends(AuthService.get_user_by_jwt)]
-AdminDep = Annotated[dict, Depends(AuthService.get_admin_by_jwt)]
\ No newline at end of file
+AdminDep = Annotated[dict, Depends(AuthService.get_admin_by_jwt)]
+ReadUOWdep = Annotated[ReadOnlyUnitOfWork, Depends(ReadOnlyUnitOfWork)]
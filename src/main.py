@@ -15,6 +15,7 @@ app.include_router(categories_router, prefix='/api/categories', tags=['categorie
 app.include_router(service_router, prefix='/api/services', tags=['services'])
 app.include_router(executer_router, prefix='/api/executers', tags=['executers'])
 app.include_router(skills_router, prefix='/api/skills', tags=['skills'])
+app.include_router(metrics_router, prefix='/api/metrics', tags=['metrics'])
 
 logger.info("FastAPI application initialized")
-logger.info("Registered routers: auth, categories, services, executers, skills")
\ No newline at end of file
+logger.info("Registered routers: auth, categories, services, executers, skills, metrics")
\ No newline at end of file
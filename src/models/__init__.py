@@ -3,3 +3,5 @@ from .categories import Categories
 from .services import Services
 from .skills import Skills
 from .executer import Executer
+from .executer_skills import ExecuterSkills
+from .outbox import OutboxMessages
@@ -2,12 +2,13 @@ from sqlalchemy.orm import Mapped, mapped_column
 from src.utils.models import Base
 from src.schemas.categories import CategorySchema
 from datetime import datetime
-from sqlalchemy import DateTime
+from sqlalchemy import DateTime, Index
 
 
 class Categories(Base):
 
     __tablename__ = 'categories'
+    __table_args__ = (Index('ix_categories_created_at_id', 'created_at', 'id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(unique=True, nullable=False, index=True)
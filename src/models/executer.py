@@ -2,12 +2,13 @@ from sqlalchemy.orm import Mapped, mapped_column
 from src.utils.models import Base
 from src.schemas.executer import ExecuterSchema, SkillsSchema
 from datetime import datetime
-from sqlalchemy import DateTime, JSON
+from sqlalchemy import DateTime, JSON, Index
 
 
 class Executer(Base):
 
     __tablename__ = 'executers'
+    __table_args__ = (Index('ix_executers_created_at_id', 'created_at', 'id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     user_id: Mapped[int] = mapped_column(nullable=False, unique=True)
@@ -0,0 +1,21 @@
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import ForeignKey, Index
+from src.utils.models import Base
+from src.schemas.executer import ExecuterSkillSchema
+
+
+class ExecuterSkills(Base):
+
+    __tablename__ = 'executer_skills'
+    __table_args__ = (Index('ix_executer_skills_skill_id_executer_id', 'skill_id', 'executer_id'),)
+
+    executer_id: Mapped[int] = mapped_column(ForeignKey('executers.id', ondelete='CASCADE'), primary_key=True)
+    skill_id: Mapped[int] = mapped_column(ForeignKey('skills.id', ondelete='CASCADE'), primary_key=True)
+    experience: Mapped[int] = mapped_column(nullable=False, default=0)
+
+    def to_schema(self):
+        return ExecuterSkillSchema(
+            executer_id=self.executer_id,
+            skill_id=self.skill_id,
+            experience=self.experience
+        )
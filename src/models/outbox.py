@@ -0,0 +1,27 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Mapped, mapped_column
+from sqlalchemy import JSON, DateTime, Index
+from src.utils.models import Base
+from src.schemas.outbox import OutboxMessageSchema
+
+
+class OutboxMessages(Base):
+
+    __tablename__ = 'outbox'
+    __table_args__ = (Index('ix_outbox_claimed_until_id', 'claimed_until', 'id'),)
+
+    id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
+    task: Mapped[str] = mapped_column(nullable=False)
+    payload: Mapped[dict] = mapped_column(JSON, default=dict)
+    attempts: Mapped[int] = mapped_column(default=0, nullable=False)
+    claimed_until: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
+
+    def to_schema(self):
+        return OutboxMessageSchema(
+            id=self.id,
+            task=self.task,
+            payload=self.payload,
+            attempts=self.attempts
+        )
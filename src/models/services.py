@@ -1,13 +1,14 @@
 from datetime import datetime
 from decimal import Decimal
 from sqlalchemy.orm import Mapped, mapped_column
-from sqlalchemy import DECIMAL, DateTime, ForeignKey, Text
+from sqlalchemy import DECIMAL, JSON, DateTime, ForeignKey, Text, Index
 from src.utils.models import Base
 from src.schemas.services import ServicesSchema
 
 class Services(Base):
 
     __tablename__ = 'services'
+    __table_args__ = (Index('ix_services_created_at_id', 'created_at', 'id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(nullable=False,index=True)
@@ -17,6 +18,7 @@ class Services(Base):
     buyer_id: Mapped[int] = mapped_column(ForeignKey('users.id'), nullable=False)
     delivery_time: Mapped[int] = mapped_column(nullable=True)
     status: Mapped[str] = mapped_column(default='Pending')
+    skills: Mapped[list] = mapped_column(JSON, default=list)
     created_at: Mapped[datetime] = mapped_column(DateTime, default=datetime.utcnow, nullable=False)
 
     def to_schema(self):
@@ -28,7 +30,8 @@ class Services(Base):
             category_id=self.category_id,
             buyer_id=self.buyer_id,
             delivery_time=self.delivery_time,
-            status=self.status
+            status=self.status,
+            skills=self.skills or []
         )
 
 
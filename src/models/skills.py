@@ -1,11 +1,12 @@
 from sqlalchemy.orm import Mapped, mapped_column
 from src.utils.models import Base
 from datetime import datetime
-from sqlalchemy import DateTime
+from sqlalchemy import DateTime, Index
 from src.schemas.skills import SkillsSchema
 
 class Skills(Base):
     __tablename__ = 'skills'
+    __table_args__ = (Index('ix_skills_created_at_id', 'created_at', 'id'),)
 
     id: Mapped[int] = mapped_column(primary_key=True, autoincrement=True)
     title: Mapped[str] = mapped_column(nullable=False, index=True, unique=True)
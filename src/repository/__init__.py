@@ -2,4 +2,6 @@ from .users import UserRepository
 from .services import ServicesRepository
 from .categories import CategoriesRepository
 from .executers import ExecuterRepository
-from .skills import SkillsRepository
+from .skills import SkillsRepository, SyncSkillsRepository
+from .executer_skills import ExecuterSkillsRepository, SyncExecuterSkillsRepository
+from .outbox import OutboxRepository
@@ -0,0 +1,27 @@
+from typing import Dict
+from sqlalchemy import delete, insert
+from src.utils.repository import SQLAlchemyRepository, SyncSQLAlchemyRepository
+from src.models.executer_skills import ExecuterSkills
+
+
+class ExecuterSkillsRepository(SQLAlchemyRepository):
+
+    entity = ExecuterSkills
+
+    async def replace(self, executer_id: int, experience_by_skill_id: Dict[int, int]):
+        await self.remove_by_executer(executer_id)
+        if experience_by_skill_id:
+            rows = [
+                {'executer_id': executer_id, 'skill_id': skill_id, 'experience': experience}
+                for skill_id, experience in experience_by_skill_id.items()
+            ]
+            await self.session.execute(insert(self.entity), rows)
+
+    async def remove_by_executer(self, executer_id: int):
+        stmt = delete(self.entity).filter_by(executer_id=executer_id)
+        await self.session.execute(stmt)
+
+
+class SyncExecuterSkillsRepository(SyncSQLAlchemyRepository):
+
+    entity = ExecuterSkills
@@ -1,17 +1,48 @@
-from sqlalchemy import func, and_, select
+from typing import Any, AsyncIterator, List, Optional, Tuple
+from sqlalchemy import func, select
+from src.schemas.pagination import PageSchema
 from src.utils.repository import SQLAlchemyRepository
 from src.models.executer import Executer
+from src.models.executer_skills import ExecuterSkills
+from src.models.skills import Skills
 
 class ExecuterRepository(SQLAlchemyRepository):
 
     entity = Executer
 
-    async def get_by_skills(self, skills: list):
-        conditions = [
-            func.json_extract(self.entity.skills, f'$.{skill}').isnot(None) # type: ignore
-            for skill in skills
-        ]
+    async def get_page_by_ids(self, ids: List[int], limit: int, cursor: Optional[str] = None) -> PageSchema:
+        stmt = select(self.entity).where(self.entity.id.in_(ids))
+        return await self._fetch_page(stmt, limit, cursor)
 
-        stmt = select(self.entity).where(and_(*conditions))
+    async def iter_skills(self, batch_size: int = 5000) -> AsyncIterator[List[Tuple[int, dict]]]:
+        last_id = 0
+        while True:
+            stmt = select(self.entity.id, self.entity.skills).where(self.entity.id > last_id).order_by(self.entity.id).limit(batch_size)
+            rows = (await self.session.execute(stmt)).tuples().all()
+            if not rows:
+                return
+            yield list(rows)
+            last_id = rows[-1][0]
+
+    async def get_by_any_skills(self, skills: list) -> List[Any]:
+        matching = (
+            select(ExecuterSkills.executer_id)
+            .join(Skills, Skills.id == ExecuterSkills.skill_id)
+            .where(Skills.title.in_(skills))
+        )
+        stmt = select(self.entity).where(self.entity.id.in_(matching))
         result = await self.session.execute(stmt)
-        return [entity.to_schema() for entity in result.scalars().all()]
\ No newline at end of file
+        return [entity.to_schema() for entity in result.scalars().all()]
+
+    async def get_by_skills(self, skills: list, limit: int, cursor: Optional[str] = None) -> PageSchema:
+        skills = list(dict.fromkeys(skills))
+        # executers holding every requested skill, resolved through the (skill_id, executer_id) index
+        matching = (
+            select(ExecuterSkills.executer_id)
+            .join(Skills, Skills.id == ExecuterSkills.skill_id)
+            .where(Skills.title.in_(skills))
+            .group_by(ExecuterSkills.executer_id)
+            .having(func.count() == len(skills))
+        )
+        stmt = select(self.entity).where(self.entity.id.in_(matching))
+        return await self._fetch_page(stmt, limit, cursor)
\ No newline at end of file
@@ -0,0 +1,36 @@
+from datetime import datetime, timedelta
+from typing import List
+from sqlalchemy import and_, delete, or_, select, update
+from src.utils.repository import SQLAlchemyRepository
+from src.models.outbox import OutboxMessages
+from src.schemas.outbox import OutboxCreateSchema, OutboxMessageSchema
+
+
+class OutboxRepository(SQLAlchemyRepository):
+
+    entity = OutboxMessages
+
+    async def enqueue(self, task: str, **kwargs) -> OutboxMessageSchema:
+        return await self.add(OutboxCreateSchema(task=task, payload=kwargs))
+
+    async def claim(self, limit: int, lease: timedelta, max_attempts: int) -> List[OutboxMessageSchema]:
+        now = datetime.utcnow()
+        # messages out of attempts stay in the table, parked for inspection instead of being retried forever
+        claimable = and_(
+            or_(self.entity.claimed_until.is_(None), self.entity.claimed_until < now),
+            self.entity.attempts < max_attempts,
+        )
+        batch = select(self.entity.id).where(claimable).order_by(self.entity.id).limit(limit)
+        # the claim predicate is repeated on the outer UPDATE so concurrent relays never take the same row
+        stmt = (
+            update(self.entity)
+            .where(self.entity.id.in_(batch), claimable)
+            .values(claimed_until=now + lease, attempts=self.entity.attempts + 1)
+            .returning(self.entity)
+        )
+        result = await self.session.execute(stmt)
+        return sorted((entity.to_schema() for entity in result.scalars().all()), key=lambda message: message.id)
+
+    async def remove_many(self, ids: List[int]):
+        stmt = delete(self.entity).where(self.entity.id.in_(ids))
+        await self.session.execute(stmt)
@@ -1,6 +1,20 @@
-from src.utils.repository import SQLAlchemyRepository
+from typing import Dict, Iterable, Tuple
+from src.utils.repository import SQLAlchemyRepository, SyncSQLAlchemyRepository
 from src.models.skills import Skills   
+from src.schemas.skills import SkillsSchema
 
 class SkillsRepository(SQLAlchemyRepository):
 
-    entity = Skills
\ No newline at end of file
+    entity = Skills
+
+    async def ensure(self, titles: Iterable[str]) -> Tuple[Dict[str, int], int]:
+        titles = list(dict.fromkeys(titles))
+        if not titles:
+            return {}, 0
+        created = await self.upsert_many([{'title': title} for title in titles], ['title'])
+        return {skill.title: skill.id for skill in await self.get_many(titles, key='title', schema=SkillsSchema)}, created
+
+
+class SyncSkillsRepository(SyncSQLAlchemyRepository):
+
+    entity = Skills
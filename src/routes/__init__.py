@@ -3,3 +3,4 @@ from .categories import router as categories_router
 from .services import router as service_router
 from .executers import router as executer_router
 from .skills import router as skills_router
+from .metrics import router as metrics_router
@@ -1,7 +1,7 @@
 from fastapi import APIRouter, Form, Request
-from src.dependencies import UOWdep
+from src.dependencies import UOWdep, UserDep
 from src.schemas.user import UserCreateSchema
-from src.schemas.auth import LoginSchema
+from src.schemas.auth import LoginSchema, LogoutSchema, RefreshSchema
 from src.service.auth import AuthService
 from src.config import limiter
 from loguru import logger
@@ -50,3 +50,27 @@ async def login_user(request: Request, uow: UOWdep, username: str = Form(...), p
         raise
 
 
+@router.post('/refresh')
+@limiter.limit('10/minute')
+async def refresh_tokens(request: Request, body: RefreshSchema, uow: UOWdep):
+    logger.info("POST /api/auth/refresh - Token refresh request")
+    try:
+        access_token, refresh_token = await AuthService().refresh(body.refresh_token, uow)
+        logger.info("Token refresh successful")
+        return {'access_token': access_token,
+                'refresh_token': refresh_token,
+                'type': 'bearer'}
+    except Exception as e:
+        logger.warning(f"Token refresh failed: {e}")
+        raise
+
+
+@router.post('/logout')
+@limiter.limit('10/minute')
+async def logout_user(request: Request, user: UserDep, body: LogoutSchema = LogoutSchema()):
+    logger.info(f"POST /api/auth/logout - Logout request from user_id={user.get('user_id')}")
+    try:
+        return await AuthService().logout(user, body.refresh_token)
+    except Exception as e:
+        logger.warning(f"Logout failed for user_id={user.get('user_id')}: {e}")
+        raise
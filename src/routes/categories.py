@@ -2,9 +2,10 @@ from fastapi import APIRouter, Depends, Request
 from src.schemas.categories import CategoryCreateSchema, CategoryUpdateSchema
 from src.service.categories import CategoriesService
 from src.service.auth import AuthService
-from src.dependencies import UOWdep, UserDep, AdminDep
-from fastapi_cache.decorator import cache
-from src.config import limiter
+from src.schemas.pagination import PageParams
+from src.dependencies import ReadUOWdep, UOWdep, UserDep, AdminDep
+from src.utils.cache import cached
+from src.config import CacheConfig, limiter
 from loguru import logger
 
 
@@ -23,13 +24,13 @@ async def create_category(request: Request, new_category: CategoryCreateSchema,
         raise
 
 @router.get('/')
-@cache(expire=60*60)
+@cached(expire=CacheConfig.catalog_ttl, tags=('categories',), raw=True)
 @limiter.limit('60/minute')
-async def get_all_categories(request: Request, uow: UOWdep):
+async def get_all_categories(request: Request, uow: ReadUOWdep, page: PageParams = Depends()):
     logger.info("GET /api/categories - List all categories request")
     try:
-        result = await CategoriesService().get_all_categories(uow)
-        logger.info(f"Retrieved {len(result) if result else 0} categories")
+        result = await CategoriesService().get_all_categories(uow, page.limit, page.cursor)
+        logger.info(f"Retrieved {len(result.items)} categories")
         return result
     except Exception as e:
         logger.error(f"Failed to list categories: {e}")
@@ -37,7 +38,7 @@ async def get_all_categories(request: Request, uow: UOWdep):
 
 @router.get('/{category_id}')
 @limiter.limit('120/minute')
-async def get_category_by_id(request: Request, category_id: int, uow: UOWdep):
+async def get_category_by_id(request: Request, category_id: int, uow: ReadUOWdep):
     logger.info(f"GET /api/categories/{category_id} - Get category request")
     try:
         result = await CategoriesService().get_category(category_id, uow)
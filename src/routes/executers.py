@@ -1,9 +1,10 @@
-from fastapi import APIRouter, Path, Query, Request
-from fastapi_cache.decorator import cache
-from src.dependencies import UOWdep, UserDep
+from fastapi import APIRouter, Depends, Path, Query, Request
+from src.utils.cache import cached
+from src.schemas.pagination import PageParams
+from src.dependencies import ReadUOWdep, UOWdep, UserDep
 from src.schemas.executer import ExecuterCreateSchema, ExecuterUpdateSchema, ExecuterFilters
 from src.service.executers import ExecuterService
-from src.config import limiter
+from src.config import CacheConfig, limiter
 from loguru import logger
 
 router = APIRouter()
@@ -22,11 +23,11 @@ async def create_executer(request: Request, executer_data: ExecuterCreateSchema,
 
 @router.get("/")
 @limiter.limit('60/minute')
-async def list_executers(request: Request, uow: UOWdep, filters: ExecuterFilters = Query(...)):
+async def list_executers(request: Request, uow: ReadUOWdep, filters: ExecuterFilters = Query(...), page: PageParams = Depends()):
     logger.info("GET /api/executers - List all executers request")
     try:
-        result = await ExecuterService().get_executers(uow, filters.dict(exclude_none=True))
-        logger.info(f"Retrieved {len(result) if result else 0} executers")
+        result = await ExecuterService().get_executers(uow, filters.dict(exclude_none=True), page.limit, page.cursor)
+        logger.info(f"Retrieved {len(result.items)} executers")
         return result
     except Exception as e:
         logger.error(f"Failed to list executers: {e}")
@@ -34,7 +35,7 @@ async def list_executers(request: Request, uow: UOWdep, filters: ExecuterFilters
 
 
 @router.get('/me')
-async def get_my_executer(request: Request, uow: UOWdep, user: UserDep):
+async def get_my_executer(request: Request, uow: ReadUOWdep, user: UserDep):
     logger.info(f"GET /api/executers/me - Get my executer request from user_id={user.get('user_id')}")
     try:
         result = await ExecuterService().get_by_user(uow, user)
@@ -46,9 +47,9 @@ async def get_my_executer(request: Request, uow: UOWdep, user: UserDep):
 
 
 @router.get("/{executer_id}")
-@cache(expire=30)
+@cached(expire=CacheConfig.catalog_ttl, tags=('executers:{executer_id}',), raw=True)
 @limiter.limit('120/minute')
-async def get_executer(request: Request, executer_id: int, uow: UOWdep):
+async def get_executer(request: Request, executer_id: int, uow: ReadUOWdep):
     logger.info(f"GET /api/executers/{executer_id} - Get executer by ID request")
     try:
         result = await ExecuterService().get_by_executer_id(uow, executer_id)
@@ -0,0 +1,11 @@
+from fastapi import APIRouter, Request
+from src.dependencies import AdminDep
+from src.utils.metrics import metrics
+from loguru import logger
+
+router = APIRouter()
+
+@router.get("/")
+async def get_metrics(request: Request, admin: AdminDep):
+    logger.info(f"GET /api/metrics - Metrics request from admin user_id={admin.get('user_id')}")
+    return await metrics.snapshot()
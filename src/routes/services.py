@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Request
-from fastapi_cache.decorator import cache
+from fastapi import APIRouter, Depends, Query, Request
+from src.utils.cache import cached
 from src.schemas.services import ServiceCreateSchema, ServiceUpdateSchema
-from src.dependencies import UOWdep, UserDep
+from src.schemas.pagination import PageParams
+from src.dependencies import ReadUOWdep, UOWdep, UserDep
 from src.service.services import ServicesService
-from src.config import limiter
+from src.service.matching import MatchingService
+from src.config import CacheConfig, MatchingConfig, limiter
 from loguru import logger
 
 
@@ -22,22 +24,22 @@ async def create_service(request: Request, service_data: ServiceCreateSchema, uo
         raise
 
 @router.get("/")
-@cache(expire=60)
+@cached(expire=CacheConfig.catalog_ttl, tags=('services',), raw=True)
 @limiter.limit('60/minute')
-async def list_services(request: Request, uow: UOWdep):
+async def list_services(request: Request, uow: ReadUOWdep, page: PageParams = Depends()):
     logger.info("GET /api/services - List all services request")
     try:
-        result = await ServicesService().get_all_service(uow)
-        logger.info(f"Retrieved {len(result) if result else 0} services")
+        result = await ServicesService().get_all_service(uow, page.limit, page.cursor)
+        logger.info(f"Retrieved {len(result.items)} services")
         return result
     except Exception as e:
         logger.error(f"Failed to list services: {e}")
         raise
 
 @router.get("/{service_id}")
-@cache(expire=30)
+@cached(expire=CacheConfig.catalog_ttl, tags=('services:{service_id}',), raw=True)
 @limiter.limit('120/minute')
-async def get_service(request: Request, service_id: int, uow: UOWdep):
+async def get_service(request: Request, service_id: int, uow: ReadUOWdep):
     logger.info(f"GET /api/services/{service_id} - Get service request")
     try:
         result = await ServicesService().get_service(service_id, uow)
@@ -47,6 +49,18 @@ async def get_service(request: Request, service_id: int, uow: UOWdep):
         logger.warning(f"Service {service_id} not found: {e}")
         raise
 
+@router.get("/{service_id}/executers")
+@limiter.limit('60/minute')
+async def match_executers(request: Request, service_id: int, uow: ReadUOWdep, k: int = Query(10, ge=1, le=MatchingConfig.max_k)):
+    logger.info(f"GET /api/services/{service_id}/executers - Match executers request, k={k}")
+    try:
+        result = await MatchingService().match_executers(uow, service_id, k)
+        logger.info(f"Matched {len(result)} executers for service {service_id}")
+        return result
+    except Exception as e:
+        logger.error(f"Failed to match executers for service {service_id}: {e}")
+        raise
+
 @router.delete("/{service_id}")
 @limiter.limit('30/minute')
 async def delete_service(request: Request, service_id: int, uow: UOWdep, user: UserDep):
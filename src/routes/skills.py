@@ -1,20 +1,21 @@
-from fastapi import APIRouter, Request
-from fastapi_cache.decorator import cache
-from src.dependencies import UOWdep
+from fastapi import APIRouter, Depends, Request
+from src.utils.cache import cached
+from src.schemas.pagination import PageParams
+from src.dependencies import ReadUOWdep
 from src.service.skills import SkillsService
-from src.config import limiter
+from src.config import CacheConfig, limiter
 from loguru import logger
 
 router = APIRouter()
 
 @router.get("/")
-@cache(expire=3600)
+@cached(expire=CacheConfig.catalog_ttl, tags=('skills',), raw=True)
 @limiter.limit('60/minute')
-async def list_skills(request: Request, uow: UOWdep):
+async def list_skills(request: Request, uow: ReadUOWdep, page: PageParams = Depends()):
     logger.info("GET /api/skills - List all skills request")
     try:
-        result = await SkillsService().get_all_skills(uow)
-        logger.info(f"Retrieved {len(result) if result else 0} skills")
+        result = await SkillsService().get_all_skills(uow, page.limit, page.cursor)
+        logger.info(f"Retrieved {len(result.items)} skills")
         return result
     except Exception as e:
         logger.error(f"Failed to list skills: {e}")
@@ -1,6 +1,14 @@
+from typing import Optional
 from pydantic import BaseModel
 from fastapi import Form
 
 class LoginSchema(BaseModel):
     username: str
-    password: str
\ No newline at end of file
+    password: str
+
+class RefreshSchema(BaseModel):
+    refresh_token: str
+
+
+class LogoutSchema(BaseModel):
+    refresh_token: Optional[str] = None
@@ -6,6 +6,11 @@ class SkillsSchema(BaseModel):
     title: str
     experience: int
 
+class ExecuterSkillSchema(BaseModel):
+    executer_id: int
+    skill_id: int
+    experience: int
+
 class ExecuterSchema(BaseModel):
     id: int
     user_id: int
@@ -34,6 +39,9 @@ class ExecuterResponseSchema(BaseModel):
     skills: List[SkillsSchema]
     created_at: datetime
 
+class ExecuterMatchSchema(ExecuterResponseSchema):
+    score: float
+
 class ExecuterFilters(BaseModel):
     skills: Optional[List[str]] = None
     username: Optional[str] = None
@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+
+
+class OutboxMessageSchema(BaseModel):
+    id: int
+    task: str
+    payload: dict
+    attempts: int
+
+
+class OutboxCreateSchema(BaseModel):
+    task: str
+    payload: dict
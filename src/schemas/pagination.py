@@ -0,0 +1,15 @@
+from typing import Generic, List, Optional, TypeVar
+from pydantic import BaseModel, Field
+from src.config import PaginationConfig
+
+T = TypeVar('T')
+
+
+class PageSchema(BaseModel, Generic[T]):
+    items: List[T] = []
+    next_cursor: Optional[str] = None
+
+
+class PageParams(BaseModel):
+    limit: int = Field(PaginationConfig.default_limit, ge=1, le=PaginationConfig.max_limit)
+    cursor: Optional[str] = None
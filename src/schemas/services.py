@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import Optional
+from typing import List, Optional
 from decimal import Decimal
 
 
@@ -12,6 +12,7 @@ class ServicesSchema(BaseModel):
     buyer_id: int
     delivery_time: Optional[int] = None
     status: str
+    skills: List[str] = []
 
 
 class ServiceCreateSchema(BaseModel):
@@ -21,6 +22,7 @@ class ServiceCreateSchema(BaseModel):
     category_id: Optional[int] = None
     buyer_id: Optional[int] = None
     delivery_time: Optional[int] = None
+    skills: List[str] = []
 
 
 
@@ -30,4 +32,5 @@ class ServiceUpdateSchema(BaseModel):
     price: Optional[Decimal] = None
     category_id: Optional[int] = None
     delivery_time: Optional[int] = None
-    status: Optional[str] = None
\ No newline at end of file
+    status: Optional[str] = None
+    skills: Optional[List[str]] = None
\ No newline at end of file
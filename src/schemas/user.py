@@ -10,6 +10,12 @@ class UserSchema(BaseModel):
     role: str
 
 
+class UserContactSchema(BaseModel):
+    id: int
+    email: EmailStr
+    username: str
+
+
 class UserCreateSchema(BaseModel):
     email: EmailStr
     username: str
@@ -1,20 +1,30 @@
 from datetime import datetime
+from typing import Optional
+from uuid import uuid4
 from src.utils.unit_of_work import IUnitOfWork
 from src.schemas.user import *
 from src.schemas.auth import LoginSchema
-from src.config import pwd_context, SecurityConfig, oauth2_scheme
+from src.config import SecurityConfig, oauth2_scheme
 from loguru import logger
 from fastapi import Depends, HTTPException, status
 from src.workers.tasks import send_welcome_email_task
+from src.utils.outbox import outbox_relay
+from src.utils.hashing import HasherOverloaded, password_hasher, pwd_context
+from src.utils.token_cache import verified_tokens
+from src.utils.revocation import token_revocations
+from src.utils.replicas import track
 from jwt import PyJWT
 
+# PyJWT instances are stateless once built, one is enough for every request
+jwt_codec = PyJWT()
+
 
 class AuthService:
 
     async def create_user(self, user_create: UserCreateSchema, uow: IUnitOfWork) -> dict:
         logger.info(f"create_user called for username='{user_create.username}', email='{user_create.email}'")
         async with uow:
-            hashed_password = pwd_context.hash(user_create.password)
+            hashed_password = await self.__run_hasher(password_hasher.hash(user_create.password))
             logger.debug(f"Password hashed for username='{user_create.username}' (value not logged)")
             try:
                 user = await uow.users.add(
@@ -24,18 +34,19 @@ class AuthService:
                         password=hashed_password
                     )
                 )
-                await uow.commit()
-                logger.info(f"User created with ID: {user.id} username='{user.username}'")
                 # generate activation token (do not log token contents)
                 activation_token = await self.generate_activation_jwt(user)
                 logger.info(f"Generated activation token for user='{user.username}' (token not logged)")
-                logger.info(f"Sending welcome email task to {user_create.email}")
-                task = send_welcome_email_task.delay(
+                # the email is queued in the same transaction, so a rolled back user is never emailed
+                await uow.outbox.enqueue(
+                    send_welcome_email_task.name,
                     to_email=user_create.email,
                     username=user_create.username,
                     action_url=f'{SecurityConfig.activation_url}?activation_token={activation_token}'
                 )
-                logger.debug(f"Celery task queued: {task}")
+                await uow.commit()
+                logger.info(f"User created with ID: {user.id} username='{user.username}', welcome email queued in outbox")
+                outbox_relay.notify()
                 return {'status': 'success'}
             except Exception as e:
                 logger.exception(f"Error creating user: {e}")
@@ -50,26 +61,28 @@ class AuthService:
             data = await self.__decode_activation_jwt(activation_token)
             username = data.get('username')
             logger.debug(f"Activation token decoded for username='{username}'")
-            user = await uow.users.get(username=username)
-            if not user:
-                logger.warning(f"activate_user: user not found for username='{username}'")
-                raise HTTPException(status_code=404)
-            user_update = await uow.users.update(user.id, is_active=True)
-            if user_update:
+            user = await uow.users.update_where({'username': username, 'is_active': False}, is_active=True)
+            if user:
                 await uow.commit()
                 logger.info(f"User activated: username='{username}', id={user.id}")
                 return {'status': 'success'}
-            logger.error(f"activate_user: failed to update user id={user.id}")
-            raise HTTPException(status_code=409)
+            # activation links stay valid until they expire, following one twice is fine
+            if await uow.users.exists(username=username):
+                logger.info(f"activate_user: username='{username}' already active")
+                return {'status': 'success'}
+            logger.warning(f"activate_user: user not found for username='{username}'")
+            raise HTTPException(status_code=404)
              
 
     async def login(self, user_login: LoginSchema, uow: IUnitOfWork):
         logger.info(f"login called for username='{user_login.username}'")
         async with uow:
             user = await uow.users.get(username=user_login.username)
-            if not user or not pwd_context.verify(user_login.password, user.password) or not user.is_active:
+            if not user or not await self.__run_hasher(password_hasher.verify(user_login.password, user.password)) or not user.is_active:
                 logger.warning(f"login failed: invalid credentials for username='{user_login.username}'")
                 raise HTTPException(status_code=400, detail='invalid credetials')
+            if pwd_context.needs_update(user.password):
+                await self.__rehash(uow, user, user_login.password)
             # returning access_token, refresh_token
             access = await self.generate_access_jwt(user)
             refresh = await self.generate_refresh_jwt(user)
@@ -77,19 +90,51 @@ class AuthService:
             return access, refresh
 
 
-    def _create_payload(self, user: UserSchema, expires):
+    async def refresh(self, refresh_token: str, uow: IUnitOfWork):
+        logger.info("refresh called (token not logged)")
+        data = await self.__decode_jwt(refresh_token, token_type='refresh')
+        async with uow:
+            user = await uow.users.get(id=data.get('user_id'))
+            if not user or not user.is_active:
+                logger.warning(f"refresh: user_id={data.get('user_id')} missing or inactive")
+                raise HTTPException(status_code=401)
+        # refresh tokens are single use, a second redemption of the same one means it leaked
+        if not await token_revocations.revoke(data['jti'], data['exp']):
+            logger.warning(f"refresh: refresh token reused for user_id={user.id}")
+            raise HTTPException(status_code=401)
+        access = await self.generate_access_jwt(user)
+        refresh = await self.generate_refresh_jwt(user)
+        logger.info(f"Tokens refreshed for user_id={user.id} (tokens not logged)")
+        return access, refresh
+
+    async def logout(self, user: dict, refresh_token: Optional[str] = None):
+        logger.info(f"logout called for user_id={user.get('user_id')}")
+        if user.get('jti'):
+            await token_revocations.revoke(user['jti'], user['exp'])
+        if refresh_token:
+            data = await self.__decode_jwt(refresh_token, token_type='refresh')
+            if data.get('user_id') != user.get('user_id'):
+                logger.warning(f"logout: refresh token of another user presented by user_id={user.get('user_id')}")
+                raise HTTPException(status_code=403)
+            await token_revocations.revoke(data['jti'], data['exp'])
+        logger.info(f"User logged out: user_id={user.get('user_id')}")
+        return {'status': 'success'}
+
+    def _create_payload(self, user: UserSchema, expires, token_type: str = 'access'):
         payload = {
             "exp": expires,
             'user_id': user.id,
             "username": user.username,
             "role": user.role,
+            "type": token_type,
+            "jti": uuid4().hex,
         }
         logger.debug(f"_create_payload: user_id='{user.id}', username='{user.username}', role='{user.role}', exp={expires}")
         return payload
 
     def _encode_jwt(self, payload: dict, key):
         logger.debug(f"_encode_jwt: encoding payload for username='{payload.get('username')}'")
-        token = PyJWT().encode(payload=payload, key=key, algorithm=SecurityConfig.algorithm)
+        token = jwt_codec.encode(payload=payload, key=key, algorithm=SecurityConfig.algorithm)
         logger.debug(f"_encode_jwt: token encoded (value not logged)")
         return token
 
@@ -109,38 +154,66 @@ class AuthService:
 
     async def generate_refresh_jwt(self, user: UserSchema):
         logger.debug(f"generate_refresh_jwt called for username='{user.username}'")
-        payload = self._create_payload(user, self.expires_time(SecurityConfig.exp_refresh))
+        payload = self._create_payload(user, self.expires_time(SecurityConfig.exp_refresh), 'refresh')
         token = self._encode_jwt(payload, SecurityConfig.secret_key)
         logger.debug(f"generate_refresh_jwt: refresh token generated for username='{user.username}' (not logged)")
         return token
 
     async def generate_activation_jwt(self, user: UserSchema):
         logger.debug(f"generate_activation_jwt called for username='{user.username}'")
-        payload = self._create_payload(user, self.expires_time(SecurityConfig.exp_activation))
+        payload = self._create_payload(user, self.expires_time(SecurityConfig.exp_activation), 'activation')
         token = self._encode_jwt(payload, SecurityConfig.activation_secret)
         logger.debug(f"generate_activation_jwt: activation token generated for username='{user.username}' (not logged)")
         return token
     
 
+    async def __rehash(self, uow: IUnitOfWork, user: UserSchema, password: str):
+        # the password was just verified, so a hash from older settings can be replaced without a reset
+        try:
+            await uow.users.update(user.id, password=await password_hasher.hash(password))
+            await uow.commit()
+            logger.info(f"Rehashed password for user_id={user.id} with current settings")
+        except Exception as e:
+            await uow.rollback()
+            logger.warning(f"Failed to rehash password for user_id={user.id}, keeping the old hash: {e}")
+
     @staticmethod
-    async def __decode_jwt(token: str):
-        logger.debug("_decode_jwt called (token not logged)")
+    async def __run_hasher(operation):
         try:
-            data = PyJWT().decode(token, key=SecurityConfig.secret_key, algorithms=[SecurityConfig.algorithm])
+            return await operation
+        except HasherOverloaded as e:
+            logger.warning(f"Password hashing overloaded: {e}")
+            raise HTTPException(status_code=503, detail="Service is busy, retry shortly", headers={'Retry-After': '1'})
+
+    @staticmethod
+    async def __decode_jwt(token: str, token_type: str = 'access'):
+        data = verified_tokens.get(token)
+        if data is None:
+            logger.debug("_decode_jwt called (token not logged)")
+            try:
+                data = jwt_codec.decode(token, key=SecurityConfig.secret_key, algorithms=[SecurityConfig.algorithm])
+            except Exception as e:
+                logger.exception(f"_decode_jwt: failed to decode token: {e}")
+                raise HTTPException(status_code=401)
             if not data:
                 logger.warning("_decode_jwt: decoded payload empty")
                 raise HTTPException(status_code=401)
             logger.debug(f"_decode_jwt: decoded payload for username='{data.get('username')}'")
-            return data
-        except Exception as e:
-            logger.exception(f"_decode_jwt: failed to decode token: {e}")
+            verified_tokens.put(token, data)
+        # tokens issued before typing was introduced are access tokens
+        if data.get('type', 'access') != token_type:
+            logger.warning(f"_decode_jwt: expected a {token_type} token, got {data.get('type', 'access')}")
+            raise HTTPException(status_code=401)
+        if data.get('jti') and await token_revocations.is_revoked(data['jti']):
+            logger.warning(f"_decode_jwt: revoked token presented for user_id='{data.get('user_id')}'")
             raise HTTPException(status_code=401)
+        return data
         
 
     async def __decode_activation_jwt(self, activation_token: str):
         logger.debug("__decode_activation_jwt called (token not logged)")
         try:
-            data = PyJWT().decode(activation_token, key=SecurityConfig.activation_secret, algorithms=[SecurityConfig.algorithm])
+            data = jwt_codec.decode(activation_token, key=SecurityConfig.activation_secret, algorithms=[SecurityConfig.algorithm])
             if not data:
                 logger.warning("__decode_activation_jwt: decoded payload empty")
                 raise HTTPException(status_code=401)
@@ -154,6 +227,7 @@ class AuthService:
     async def get_admin_by_jwt(cls, token: str=Depends(oauth2_scheme)):
         logger.debug("get_admin_by_jwt called (token not logged)")
         user_data = await cls.__decode_jwt(token)
+        track(f"user:{user_data.get('user_id')}")
         if user_data.get('role') != 'admin':
             logger.warning(f"get_admin_by_jwt: access denied for user_id='{user_data.get('user_id')}', insufficient role")
             raise HTTPException(status_code=403)
@@ -164,5 +238,6 @@ class AuthService:
     async def get_user_by_jwt(cls, token: str=Depends(oauth2_scheme)):
         logger.debug("get_user_by_jwt called (token not logged)")
         user_data = await cls.__decode_jwt(token)
+        track(f"user:{user_data.get('user_id')}")
         logger.debug(f"get_user_by_jwt: user authenticated user_id='{user_data.get('user_id')}'")
         return user_data
@@ -1,5 +1,6 @@
+from typing import Optional
 from src.utils.unit_of_work import IUnitOfWork
-from src.schemas.categories import CategoryCreateSchema, CategoryUpdateSchema
+from src.schemas.categories import CategoryCreateSchema, CategorySchema, CategoryUpdateSchema
 from fastapi import HTTPException
 from loguru import logger
 
@@ -9,6 +10,7 @@ class CategoriesService:
         async with uow:
             try:
                 category = await uow.categories.add(new_category)
+                uow.invalidate('categories')
                 await uow.commit()
                 logger.info(f"Category created successfully: {category}")
                 return {
@@ -19,11 +21,15 @@ class CategoriesService:
                 logger.exception(f"Failed to create category")
                 raise HTTPException(status_code=409, detail='Cannot category created')
             
-    async def get_all_categories(self, uow: IUnitOfWork):
-        logger.info("CategoriesService.get_all_categories called")
+    async def get_all_categories(self, uow: IUnitOfWork, limit: int, cursor: Optional[str] = None):
+        logger.info(f"CategoriesService.get_all_categories called with limit={limit}")
         async with uow:
-            categories = await uow.categories.list()
-            logger.info(f"Retrieved {len(categories) if categories else 0} categories from database")
+            try:
+                categories = await uow.categories.list_page(limit, cursor, schema=CategorySchema)
+            except ValueError as e:
+                logger.warning(f"Invalid categories cursor: {e}")
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            logger.info(f"Retrieved {len(categories.items)} categories from database")
             return categories
         
     
@@ -41,9 +47,13 @@ class CategoriesService:
     async def delete_category(self, category_id: int, uow: IUnitOfWork):
         logger.info(f"CategoriesService.delete_category called for category_id={category_id}")
         async with uow:
-            category = await self.get_category(category_id=category_id, uow=uow)
+            category = await uow.categories.get(id=category_id)
+            if not category:
+                logger.warning(f"Category {category_id} not found")
+                raise HTTPException(status_code=404)
             try:
                 await uow.categories.remove(category)
+                uow.invalidate('categories', f'categories:{category_id}')
                 await uow.commit()
                 logger.info(f"Category {category_id} deleted successfully")
                 return {'status': 'success'}
@@ -60,6 +70,7 @@ class CategoriesService:
                     update_data[k] = new_category_data.dict().get(k)
             logger.debug(f"Updating category {category_id} with data: {update_data}")
             updated_category = await uow.categories.update(category_id, **update_data)
+            uow.invalidate('categories', f'categories:{category_id}')
             await uow.commit()
             if not updated_category:
                 logger.warning(f"Category {category_id} update failed - category not found after update")
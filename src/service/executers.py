@@ -1,8 +1,12 @@
 from typing import List, Optional
 from loguru import logger
 from src.utils.unit_of_work import IUnitOfWork
+from src.schemas.pagination import PageSchema
 from src.schemas.executer import ExecuterCreateSchema, ExecuterDBSchema, ExecuterResponseSchema, ExecuterUpdateSchema, ExecuterUserSchema, SkillsSchema
-from src.workers.tasks import create_skills_task
+from src.config import SkillIndexConfig
+from src.utils.matching import matching_engine
+from src.utils.skill_index import skill_index
+from src.utils.skill_ingestion import known_skills
 from fastapi import HTTPException, Response
 
 class ExecuterService:
@@ -22,10 +26,12 @@ class ExecuterService:
                 executer = await uow.executers.add(executer)
                 uow.users.update(executer_data.user_id, role='executer') # type: ignore
                 if executer:
+                    skill_ids = await self.__sync_skills(uow, executer.id, skills_dict)
+                    uow.invalidate('executers', f'executers:{executer.id}')
                     await uow.commit()
+                    known_skills.remember(skill_ids)
+                    await self.__refresh_projections(executer.id, skills_dict)
                     logger.info(f"Executer created successfully with id={executer.id} for user_id={executer_data.user_id}")
-                    logger.debug(f"Queuing skills creation task for {len(skills_dict)} skills")
-                    create_skills_task.delay(skills_dict)
                     return executer
                 else:
                     logger.error("Executer could not be created - add returned None")
@@ -34,35 +40,43 @@ class ExecuterService:
                 logger.exception(f"Error creating executer: {e}")
                 raise HTTPException(status_code=400, detail="Executer with this user_id already exists.")
                 
-    async def get_executers(self, uow: IUnitOfWork, filters: dict):
-        logger.info("ExecuterService.get_executers called")
+    async def get_executers(self, uow: IUnitOfWork, filters: dict, limit: int, cursor: Optional[str] = None):
+        logger.info(f"ExecuterService.get_executers called with limit={limit}")
         async with uow:
             if filters.get('username'):
                 user = await uow.users.get(username=filters.get('username'))
                 if not user:
                     logger.warning(f"No user found with username={filters.get('username')}")
-                    return []
+                    return PageSchema[ExecuterResponseSchema]()
                 del filters['username']
                 filters['user_id'] = user.id
             if filters.get('email'):
                 user = await uow.users.get(email=filters.get('email'))
                 if not user:
                     logger.warning(f"No user found with email={filters.get('email')}")
-                    return []
+                    return PageSchema[ExecuterResponseSchema]()
                 del filters['email']
                 filters['user_id'] = user.id
-            executers = await uow.executers.list(**filters) if filters.get('skills') is None else await uow.executers.get_by_skills(filters.get('skills'))  # type: ignore
-            logger.info(f"Retrieved {len(executers) if executers else 0} executers from database")
+            try:
+                if filters.get('skills') is None:
+                    executers = await uow.executers.list_page(limit, cursor, **filters)
+                else:
+                    executers = await self.__get_by_skills(uow, filters.get('skills'), limit, cursor)  # type: ignore
+            except ValueError as e:
+                logger.warning(f"Invalid executers cursor: {e}")
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            logger.info(f"Retrieved {len(executers.items)} executers from database")
+            users = await uow.user_loader.load_many(executer.user_id for executer in executers.items) # type: ignore
             exec_response = []
-            for executer in executers:
-                user = await uow.users.get(id=executer.user_id) # type: ignore
+            for executer in executers.items:
+                user = users[executer.user_id] # type: ignore
                 logger.debug(f"Fetched user for executer {executer.id}: user_id={user.id if user else None}")  # type: ignore
                 exec_response.append(ExecuterResponseSchema(id=executer.id, # type: ignore
                                                              user=ExecuterUserSchema(email=user.email, username=user.username),  # type: ignore
                                                              skills=executer.skills,  # type: ignore
                                                              created_at=executer.created_at)) # type: ignore
             logger.info(f"Prepared response for {len(exec_response)} executers")
-            return exec_response
+            return PageSchema[ExecuterResponseSchema](items=exec_response, next_cursor=executers.next_cursor)
         
 
     async def get_by_executer_id(self, uow: IUnitOfWork, executer_id: int):
@@ -72,7 +86,7 @@ class ExecuterService:
             if not executer:
                 logger.warning(f"Executer with id={executer_id} not found")
                 raise HTTPException(status_code=404, detail="Executer not found")
-            user = await uow.users.get(id=executer.user_id)
+            user = await uow.user_loader.load(executer.user_id)
             logger.debug(f"Fetched user for executer {executer.id}: user_id={user.id if user else None}")  # type: ignore
             exec_response = ExecuterResponseSchema(id=executer.id,
                                                    user=ExecuterUserSchema(email=user.email, username=user.username),  # type: ignore
@@ -95,15 +109,18 @@ class ExecuterService:
     async def delete(self, uow: IUnitOfWork, executer_id: int, user: dict):
         logger.info(f"ExecuterService.delete called for executer_id={executer_id} by user_id={user.get('user_id')}")
         async with uow:
-            executer = await uow.executers.get(id=executer_id)
-            if not executer:
+            owned = {'id': executer_id} if user.get('role') == 'admin' else {'id': executer_id, 'user_id': user.get('user_id')}
+            if not await uow.executers.remove_where(**owned):
+                if await uow.executers.exists(id=executer_id):
+                    logger.warning(f"User_id={user.get('user_id')} unauthorized to delete executer id={executer_id}")
+                    raise HTTPException(status_code=403, detail="Not authorized to delete this executer")
                 logger.warning(f"Executer with id={executer_id} not found")
                 raise HTTPException(status_code=404, detail="Executer not found")
-            if not (executer.user_id == user.get('user_id') or user.get('is_admin')):
-                logger.warning(f"User_id={user.get('user_id')} unauthorized to delete executer id={executer_id}")
-                raise HTTPException(status_code=403, detail="Not authorized to delete this executer")
-            await uow.executers.remove(executer)
+            # the foreign key cascades where it is enforced, SQLite leaves it to us
+            await uow.executer_skills.remove_by_executer(executer_id)
+            uow.invalidate('executers', f'executers:{executer_id}')
             await uow.commit()
+            await self.__refresh_projections(executer_id, {})
             logger.info(f"Executer with id={executer_id} deleted successfully by user_id={user.get('user_id')}")
             return {"detail": "success"}
         
@@ -112,26 +129,52 @@ class ExecuterService:
         if executer_data.skills is None:
             return Response(status_code=304)
         async with uow:
-            if (executer_id or user.get('is_admin')) and executer_id is not -1:
-                executer = await uow.executers.get(id=executer_id)
-            else: 
-                executer = await uow.executers.get(user_id=user.get('user_id'))
+            skill_dict = self.__skills_dict(executer_data.skills)
+            # ownership is part of the WHERE clause, so there is no window between the check and the update
+            if executer_id and executer_id != -1:
+                owned = {'id': executer_id} if user.get('role') == 'admin' else {'id': executer_id, 'user_id': user.get('user_id')}
+            else:
+                owned = {'user_id': user.get('user_id')}
+            executer = await uow.executers.update_where(owned, skills=skill_dict)
             if not executer:
+                if 'id' in owned and await uow.executers.exists(id=executer_id):
+                    logger.warning(f"User_id={user.get('user_id')} unauthorized to update executer id={executer_id}")
+                    raise HTTPException(status_code=403, detail="Not authorized to update this executer")
                 logger.warning(f"Executer with id={executer_id} not found")
                 raise HTTPException(status_code=404, detail="Executer not found")
-            if not (executer.user_id == user.get('user_id') or user.get('is_admin')):
-                logger.warning(f"User_id={user.get('user_id')} unauthorized to update executer id={executer_id}")
-                raise HTTPException(status_code=403, detail="Not authorized to update this executer")
-            skill_dict = self.__skills_dict(executer_data.skills)   
-            execute_db = ExecuterDBSchema(
-                user_id=executer.user_id, # type: ignore
-                skills=skill_dict
-            )
-            update_executer = await uow.executers.update(executer.id, **execute_db.dict()) # type: ignore
+            skill_ids = await self.__sync_skills(uow, executer.id, skill_dict)
+            uow.invalidate('executers', f'executers:{executer.id}')
             await uow.commit()
+            known_skills.remember(skill_ids)
+            await self.__refresh_projections(executer.id, skill_dict)
             logger.info(f"Executer with id={executer_id} updated successfully by user_id={user.get('user_id')}")
-            create_skills_task.delay(skill_dict) # type: ignore
-            return update_executer
+            return executer
+
+    async def __get_by_skills(self, uow: IUnitOfWork, skills: List[str], limit: int, cursor: Optional[str]) -> PageSchema:
+        ids = await skill_index.search(uow, skills)
+        if ids is None or len(ids) > SkillIndexConfig.max_hydrate_ids:
+            return await uow.executers.get_by_skills(skills, limit, cursor)
+        logger.debug(f"Skill index matched {len(ids)} executers for skills={skills}")
+        if not ids:
+            return PageSchema()
+        return await uow.executers.get_page_by_ids(ids, limit, cursor)
+
+    async def __sync_skills(self, uow: IUnitOfWork, executer_id: int, skills_dict: dict) -> dict:
+        # known titles are resolved from memory, only the rest pay for the upsert and the id lookup
+        skill_ids, unknown = known_skills.resolve(skills_dict.keys())
+        if unknown:
+            ensured, created = await uow.skills.ensure(unknown)
+            skill_ids.update(ensured)
+            known_skills.record_flush(len(unknown), created)
+            if created:
+                uow.invalidate('skills')
+        await uow.executer_skills.replace(executer_id, {skill_ids[title]: experience for title, experience in skills_dict.items()})
+        logger.debug(f"Synced {len(skill_ids)} executer_skills rows for executer id={executer_id}, {len(unknown)} titles upserted")
+        return skill_ids
+
+    async def __refresh_projections(self, executer_id: int, skills_dict: dict):
+        await skill_index.update(executer_id, skills_dict)
+        await matching_engine.update(executer_id, skills_dict)
 
     def __skills_dict(self, skills: List[SkillsSchema]) -> dict:
         return {skill.title: skill.experience for skill in skills}
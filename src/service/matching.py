@@ -0,0 +1,44 @@
+from typing import List
+from fastapi import HTTPException
+from loguru import logger
+from src.utils.unit_of_work import IUnitOfWork
+from src.utils.matching import matching_engine, score_executer
+from src.schemas.executer import ExecuterMatchSchema, ExecuterUserSchema
+
+
+class MatchingService:
+
+    async def match_executers(self, uow: IUnitOfWork, service_id: int, k: int) -> List[ExecuterMatchSchema]:
+        logger.info(f"MatchingService.match_executers called for service_id={service_id}, k={k}")
+        async with uow:
+            service = await uow.services.get(id=service_id)
+            if not service:
+                logger.warning(f"Service {service_id} not found")
+                raise HTTPException(status_code=404)
+            if not service.skills:
+                logger.info(f"Service {service_id} has no required skills, nothing to match")
+                return []
+            ranked = await matching_engine.top_k(uow, service.skills, k)
+            if ranked is None:
+                logger.debug("Matching engine disabled, scoring skill candidates row by row")
+                ranked = await self.__rank_naive(uow, service.skills, k)
+            executers = {executer.id: executer for executer in await uow.executers.get_many([executer_id for executer_id, _ in ranked])}
+            users = await uow.user_loader.load_many(executer.user_id for executer in executers.values())
+            matches = []
+            for executer_id, score in ranked:
+                executer = executers.get(executer_id)
+                user = users.get(executer.user_id) if executer else None
+                if not executer or not user:
+                    continue
+                matches.append(ExecuterMatchSchema(id=executer.id,
+                                                   user=ExecuterUserSchema(email=user.email, username=user.username),
+                                                   skills=executer.skills,
+                                                   created_at=executer.created_at,
+                                                   score=score))
+            logger.info(f"Matched {len(matches)} executers for service_id={service_id}")
+            return matches
+
+    async def __rank_naive(self, uow: IUnitOfWork, required: List[str], k: int):
+        candidates = await uow.executers.get_by_any_skills(required)
+        scored = [(executer.id, score_executer({skill.title: skill.experience for skill in executer.skills}, required)) for executer in candidates]
+        return sorted(scored, key=lambda item: -item[1])[:k]
@@ -1,5 +1,6 @@
+from typing import Optional
 from src.utils.unit_of_work import IUnitOfWork
-from src.schemas.services import ServiceCreateSchema, ServiceUpdateSchema
+from src.schemas.services import ServiceCreateSchema, ServicesSchema, ServiceUpdateSchema
 from fastapi import HTTPException
 from loguru import logger
 
@@ -14,6 +15,7 @@ class ServicesService:
             logger.debug("Attempting to add service with data: %s", service_data)
             service = await uow.services.add(service_data)
             if service:
+                uow.invalidate('services')
                 await uow.commit()
                 svc_id = getattr(service, 'id', None)
                 logger.info("Service created successfully, id={}", svc_id)
@@ -22,11 +24,15 @@ class ServicesService:
                 logger.exception("Service could not be created for data: %s", service_data)
                 raise HTTPException(status_code=400, detail="Service could not be created")
 
-    async def get_all_service(self, uow: IUnitOfWork):
-        logger.info("ServicesService.get_all_service called")
+    async def get_all_service(self, uow: IUnitOfWork, limit: int, cursor: Optional[str] = None):
+        logger.info(f"ServicesService.get_all_service called with limit={limit}")
         async with uow:
-            services = await uow.services.list()
-            logger.info(f"Retrieved {len(services) if services else 0} services from database")
+            try:
+                services = await uow.services.list_page(limit, cursor, schema=ServicesSchema)
+            except ValueError as e:
+                logger.warning(f"Invalid services cursor: {e}")
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            logger.info(f"Retrieved {len(services.items)} services from database")
             return services
         
     async def get_service(self, service_id: int, uow: IUnitOfWork):
@@ -42,34 +48,55 @@ class ServicesService:
     async def delete_service(self, service_id: int, uow: IUnitOfWork, user: dict):
         logger.info(f"ServicesService.delete_service called for service_id={service_id} by user_id={user.get('user_id')}")
         async with uow:
-            service = await self.get_service(service_id=service_id, uow=uow)
-            if not (service.buyer_id == user.get('user_id') or user.get('role') == 'admin'):
-                logger.warning(f"Access denied: user_id={user.get('user_id')} attempted to delete service_id={service_id}")
-                raise HTTPException(status_code=403)
             try:
-                await uow.services.remove(service)
-                await uow.commit()
-                logger.info(f"Service {service_id} deleted successfully by user_id={user.get('user_id')}")
-                return {'status': 'success'}
+                # ownership is part of the WHERE clause, so there is no window between the check and the delete
+                deleted = await uow.services.remove_where(**self.__owned(service_id, user))
             except Exception as e:
                 logger.exception(f"Failed to delete service {service_id}: {e}")
                 raise HTTPException(status_code=409)
+            if not deleted:
+                await self.__raise_miss(uow, service_id, user, 'delete')
+            uow.invalidate('services', f'services:{service_id}')
+            await uow.commit()
+            logger.info(f"Service {service_id} deleted successfully by user_id={user.get('user_id')}")
+            return {'status': 'success'}
             
     async def update_service(self, service_id: int, new_service_data: ServiceUpdateSchema, uow: IUnitOfWork, user: dict):
         logger.info(f"ServicesService.update_service called for service_id={service_id} by user_id={user.get('user_id')}")
+        payload = new_service_data.dict(exclude_none=True)
+        update_data = {k: v for k, v in payload.items() if v is not None}
+        if not update_data:
+            logger.debug(f"Nothing to update for service {service_id}")
+            return await self.__get_owned(service_id, uow, user)
         async with uow:
-            service = await self.get_service(service_id=service_id, uow=uow)
-            if not (service.buyer_id == user.get('user_id') or user.get('role') == 'admin'):
-                logger.warning(f"Access denied: user_id={user.get('user_id')} attempted to update service_id={service_id}")
-                raise HTTPException(status_code=403)
-            payload = new_service_data.dict(exclude_none=True)
-            update_data = {k: v for k, v in payload.items() if v is not None}
             logger.debug(f"Updating service {service_id} with data: {update_data}")
-            updated_service = await uow.services.update(service_id, **update_data)
-            await uow.commit()
+            updated_service = await uow.services.update_where(self.__owned(service_id, user), **update_data)
             if not updated_service:
-                logger.warning(f"Service {service_id} update failed - service not found after update")
-                raise HTTPException(status_code=404)
+                await self.__raise_miss(uow, service_id, user, 'update')
+            uow.invalidate('services', f'services:{service_id}')
+            await uow.commit()
             logger.info(f"Service {service_id} updated successfully by user_id={user.get('user_id')}")
             return updated_service
+
+    async def __get_owned(self, service_id: int, uow: IUnitOfWork, user: dict):
+        service = await self.get_service(service_id=service_id, uow=uow)
+        if not (service.buyer_id == user.get('user_id') or user.get('role') == 'admin'):
+            logger.warning(f"Access denied: user_id={user.get('user_id')} attempted to update service_id={service_id}")
+            raise HTTPException(status_code=403)
+        return service
+
+    @staticmethod
+    def __owned(service_id: int, user: dict) -> dict:
+        if user.get('role') == 'admin':
+            return {'id': service_id}
+        return {'id': service_id, 'buyer_id': user.get('user_id')}
+
+    @staticmethod
+    async def __raise_miss(uow: IUnitOfWork, service_id: int, user: dict, action: str):
+        # only a miss pays for the second query that tells "not yours" from "not there"
+        if await uow.services.exists(id=service_id):
+            logger.warning(f"Access denied: user_id={user.get('user_id')} attempted to {action} service_id={service_id}")
+            raise HTTPException(status_code=403)
+        logger.warning(f"Service {service_id} not found")
+        raise HTTPException(status_code=404)
     
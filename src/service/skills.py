@@ -1,6 +1,8 @@
 
-from typing import List
+from typing import Optional
+from fastapi import HTTPException
 from src.utils.unit_of_work import IUnitOfWork
+from src.schemas.pagination import PageSchema
 from src.schemas.skills import SkillsSchema
 from loguru import logger
 
@@ -8,10 +10,14 @@ from loguru import logger
 class SkillsService:
     
 
-    async def get_all_skills(self, uow: IUnitOfWork) -> List[SkillsSchema]:
-        logger.info("SkillsService.get_all_skills called")
+    async def get_all_skills(self, uow: IUnitOfWork, limit: int, cursor: Optional[str] = None) -> PageSchema[SkillsSchema]:
+        logger.info(f"SkillsService.get_all_skills called with limit={limit}")
         async with uow:
-            skills = await uow.skills.list()
-            logger.info(f"Retrieved {len(skills) if skills else 0} skills from database")
+            try:
+                skills = await uow.skills.list_page(limit, cursor, schema=SkillsSchema)
+            except ValueError as e:
+                logger.warning(f"Invalid skills cursor: {e}")
+                raise HTTPException(status_code=400, detail="Invalid cursor")
+            logger.info(f"Retrieved {len(skills.items)} skills from database")
             return skills
         
\ No newline at end of file
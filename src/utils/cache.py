@@ -0,0 +1,317 @@
+import asyncio
+import gzip
+import hashlib
+import json
+import math
+import random
+import time
+from datetime import date, datetime
+from enum import Enum
+from functools import wraps
+from inspect import Parameter, Signature
+from typing import Any, Awaitable, Callable, Dict, Optional, Sequence, Tuple
+from fastapi import BackgroundTasks
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.dependencies.utils import get_typed_return_annotation, get_typed_signature
+from fastapi_cache import FastAPICache
+from pydantic import BaseModel
+from starlette.requests import Request
+from starlette.responses import Response
+from loguru import logger
+from src.config import CacheConfig
+from src.utils.cache_locks import recompute_locks
+from src.utils.cache_tags import cache_tags, tag_invalidator
+from src.utils.metrics import metrics
+from src.utils.replicas import track
+from src.utils.unit_of_work import IUnitOfWork
+
+# injected per request, never part of what the response depends on
+DEPENDENCY_TYPES = (IUnitOfWork, Request, Response, BackgroundTasks)
+
+
+def canonical(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return canonical(value.model_dump(mode='json'))
+    if isinstance(value, Enum):
+        return canonical(value.value)
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    if isinstance(value, dict):
+        return {str(k): canonical(v) for k, v in value.items()}
+    if isinstance(value, (set, frozenset)):
+        return sorted(canonical(v) for v in value)
+    if isinstance(value, (list, tuple)):
+        return [canonical(v) for v in value]
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return value
+    raise TypeError(f"Cannot build a cache key from {type(value).__name__}")
+
+
+class RouteKeyBuilder:
+
+    def __init__(self, principal: Optional[str] = None):
+        # name of the auth dependency parameter whose user_id partitions the cache
+        self.principal = principal
+
+    def __call__(self, func: Callable[..., Any], namespace: str = '', *, request: Optional[Request] = None,
+                 response: Optional[Response] = None, args: Tuple[Any, ...] = (), kwargs: Dict[str, Any] = {},
+                 tags: Optional[Dict[str, int]] = None, epoch: Optional[str] = None) -> str:
+        params = {
+            name: canonical(value) for name, value in kwargs.items()
+            if name != self.principal and not isinstance(value, DEPENDENCY_TYPES)
+        }
+        if self.principal:
+            params['__principal'] = kwargs[self.principal].get('user_id')
+        params['__tags'] = tags or {}
+        if epoch:
+            params['__epoch'] = epoch
+        payload = json.dumps(params, sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+        return f"{namespace}:{func.__name__}:{hashlib.sha1(payload.encode()).hexdigest()}"
+
+
+# entries are stored as a JSON metadata line followed by the coder's payload
+def pack(body: bytes, **meta: Any) -> bytes:
+    return json.dumps(meta, separators=(',', ':')).encode() + b'\n' + body
+
+
+def unpack(raw: bytes) -> Optional[Tuple[dict, bytes]]:
+    header, sep, body = raw.partition(b'\n')
+    try:
+        return (json.loads(header), body) if sep else None
+    except ValueError:
+        return None
+
+
+def should_refresh_early(delta: float, ttl: int, beta: float) -> bool:
+    # probabilistic early expiration (XFetch): the closer to expiry and the slower the recompute, the likelier
+    return beta > 0 and delta * beta * -math.log(1.0 - random.random()) >= ttl
+
+
+# parameter added to the endpoint signature when it does not declare a Response itself
+INJECTED_RESPONSE = '__cache_response'
+
+_inflight: Dict[str, asyncio.Task] = {}
+
+
+def _param_of(signature: Signature, annotation: type) -> Optional[str]:
+    return next((p.name for p in signature.parameters.values() if p.annotation is annotation), None)
+
+
+def _uncacheable(request: Optional[Request]) -> bool:
+    if not FastAPICache.get_enable():
+        return True
+    return request is not None and (request.method != 'GET' or request.headers.get('Cache-Control') == 'no-store')
+
+
+async def _load(key: str) -> Optional[Tuple[int, dict, bytes]]:
+    try:
+        ttl, raw = await FastAPICache.get_backend().get_with_ttl(key)
+    except Exception as e:
+        logger.warning(f"Error retrieving cache key '{key}': {e}")
+        return None
+    entry = unpack(raw) if raw is not None else None
+    return (ttl, *entry) if entry is not None else None
+
+
+def _single_flight(key: str, produce: Callable[[], Awaitable[Any]]) -> Tuple[asyncio.Task, bool]:
+    # the recompute runs as its own task, so the request that started it can disconnect without failing the others
+    task = _inflight.get(key)
+    if task is not None:
+        return task, True
+    task = asyncio.ensure_future(produce())
+    _inflight[key] = task
+
+    def done(finished: asyncio.Task):
+        if _inflight.get(key) is finished:
+            del _inflight[key]
+        if not finished.cancelled():
+            finished.exception()
+
+    task.add_done_callback(done)
+    return task, False
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    return matching_etag(if_none_match, (etag,)) is not None
+
+
+def matching_etag(if_none_match: Optional[str], etags: Sequence[str]) -> Optional[str]:
+    if not if_none_match:
+        return None
+    candidates = [candidate.strip().removeprefix('W/') for candidate in if_none_match.split(',')]
+    if '*' in candidates:
+        return etags[0]
+    return next((etag for etag in etags if etag in candidates), None)
+
+
+def gzip_etag(etag: str) -> str:
+    # the gzipped and identity bodies are different representations, a strong ETag must tell them apart
+    return f'{etag[:-1]}-gzip"'
+
+
+def client_cache_control(max_age: int, tagged: bool) -> str:
+    # the server TTL only bounds memory for tagged entries, a client holding them that long would miss writes
+    if tagged:
+        max_age = min(max_age, CacheConfig.client_max_age)
+    return f'max-age={max_age}' if max_age > 0 else 'no-cache'
+
+
+def encode_response(result: Any) -> Tuple[dict, bytes]:
+    # render exactly as FastAPI would, once, so hits can hand the bytes straight back
+    body = JSONResponse(jsonable_encoder(result)).body
+    meta = {'etag': f'"{hashlib.sha1(body).hexdigest()}"', 'media_type': 'application/json'}
+    if CacheConfig.compress_min_bytes and len(body) >= CacheConfig.compress_min_bytes:
+        body = gzip.compress(body, compresslevel=CacheConfig.compress_level, mtime=0)
+        meta['encoding'] = 'gzip'
+    return meta, body
+
+
+def raw_response(meta: dict, body: bytes, request: Optional[Request], headers: Dict[str, str]) -> Response:
+    headers = {**headers, 'ETag': meta['etag'], 'Vary': 'Accept-Encoding'}
+    gzipped = meta.get('encoding') == 'gzip' and request is not None and 'gzip' in request.headers.get('Accept-Encoding', '')
+    if gzipped:
+        headers['ETag'] = gzip_etag(meta['etag'])
+        headers['Content-Encoding'] = 'gzip'
+    if request is not None and etag_matches(request.headers.get('If-None-Match'), headers['ETag']):
+        headers.pop('Content-Encoding', None)
+        return Response(status_code=304, headers=headers)
+    if meta.get('encoding') == 'gzip' and not gzipped:
+        body = gzip.decompress(body)
+    return Response(body, media_type=meta['media_type'], headers=headers)
+
+
+def cached(expire: int, tags: Sequence[str] = (), principal: Optional[str] = None, namespace: str = '', raw: bool = False):
+    """Cache an endpoint's result in ``FastAPICache``'s backend, counting ``cache.<route>.<outcome>``.
+
+    ``tags`` are formatted with the endpoint kwargs (``'services:{service_id}'``); the current version of
+    each is part of the key, so ``IUnitOfWork.invalidate`` on any of them makes the entry unreachable.
+    Misses are recomputed once per key: concurrent requests in the process await the same task and other
+    processes wait on a short Redis lock. Hot entries are refreshed early with XFetch. Tagged endpoints get
+    an ETag derived from the key and the tag store's epoch, so a matching ``If-None-Match`` is answered with ``304`` before the cache
+    or the database is touched. Their ``Cache-Control`` is ``CacheConfig.client_max_age`` rather than
+    ``expire``, since clients only learn about writes by revalidating.
+
+    With ``raw`` the entry is the rendered (possibly gzipped) JSON body with its ETag and a hit returns it
+    as a ``Response`` untouched, skipping decoding, ``jsonable_encoder`` and re-encoding. The endpoint's
+    ``response_model`` is not applied to raw responses. A gzipped body gets its own ETag (``"...-gzip"``)
+    and every raw response carries ``Vary: Accept-Encoding``.
+    """
+    def wrapper(func):
+        signature = get_typed_signature(func)
+        return_type = get_typed_return_annotation(func)
+        request_param = _param_of(signature, Request)
+        response_param = _param_of(signature, Response) or INJECTED_RESPONSE
+        key_builder = RouteKeyBuilder(principal)
+        route = func.__name__
+
+        @wraps(func)
+        async def inner(*args, **kwargs):
+            response: Response = kwargs[response_param]
+            if response_param == INJECTED_RESPONSE:
+                del kwargs[INJECTED_RESPONSE]
+            request: Optional[Request] = kwargs.get(request_param) if request_param else None
+
+            if _uncacheable(request):
+                metrics.inc(f'cache.{route}.bypass')
+                return await func(*args, **kwargs)
+            versions, epoch = {}, None
+            if tags:
+                names = [tag.format(**kwargs) for tag in tags]
+                # reads for tags written moments ago go to the primary, or a lagging replica gets cached
+                track(*names)
+                if tag_invalidator.is_pending(names):
+                    # a write to these tags has not bumped their versions yet, cached entries may predate it
+                    metrics.inc(f'cache.{route}.bypass')
+                    return await func(*args, **kwargs)
+                try:
+                    versions = dict(zip(names, await cache_tags.get_many(names)))
+                    epoch = cache_tags.epoch
+                except Exception as e:
+                    # without tag versions a cached entry could be stale, serve from the database
+                    logger.warning(f"Cache tag versions unavailable for {route}: {e}")
+                    metrics.inc(f'cache.{route}.bypass')
+                    return await func(*args, **kwargs)
+
+            coder = FastAPICache.get_coder()
+            status_header = FastAPICache.get_cache_status_header()
+            key = key_builder(func, f"{FastAPICache.get_prefix()}:{namespace}", kwargs=kwargs, tags=versions, epoch=epoch)
+            # the key already embeds the tag versions writes bump and the epoch of their store, so it names this representation
+            etag = f'"{hashlib.sha1(key.encode()).hexdigest()}"' if versions else None
+            # a client revalidating a gzipped raw body sends back its encoding-specific ETag
+            matched = matching_etag(request.headers.get('If-None-Match'), (etag, gzip_etag(etag)) if raw else (etag,)) \
+                if etag and request is not None else None
+            if matched:
+                metrics.inc(f'cache.{route}.not_modified')
+                headers = {'ETag': matched, 'Cache-Control': client_cache_control(expire, True)}
+                if raw:
+                    headers['Vary'] = 'Accept-Encoding'
+                return Response(status_code=304, headers=headers)
+
+            def respond(meta: dict, body: bytes, result: Any, status: str, max_age: int) -> Any:
+                headers = {'Cache-Control': client_cache_control(max_age, bool(versions)), status_header: status}
+                if raw:
+                    return raw_response({**meta, 'etag': etag} if etag else meta, body, request, headers)
+                if etag:
+                    headers['ETag'] = etag
+                response.headers.update(headers)
+                return result if result is not None else coder.decode_as_type(body, type_=return_type)
+
+            async def produce(wait_for_peer: bool) -> Optional[Tuple[dict, bytes, Any]]:
+                try:
+                    token = await recompute_locks.acquire(key, CacheConfig.lock_timeout)
+                except Exception as e:
+                    logger.warning(f"Cache lock unavailable for {route}, recomputing without it: {e}")
+                    token = ''
+                if token is None:
+                    # another process is recomputing this key
+                    if not wait_for_peer:
+                        return None
+                    deadline = time.monotonic() + CacheConfig.lock_wait
+                    while time.monotonic() < deadline:
+                        await asyncio.sleep(CacheConfig.lock_poll_interval)
+                        entry = await _load(key)
+                        if entry is not None:
+                            metrics.inc(f'cache.{route}.coalesced')
+                            return entry[1], entry[2], None
+                    logger.warning(f"Gave up waiting for a peer to recompute {key}")
+                try:
+                    started = time.perf_counter()
+                    result = await func(*args, **kwargs)
+                    meta, body = encode_response(result) if raw else ({}, coder.encode(result))
+                    meta['delta'] = round(time.perf_counter() - started, 4)
+                    try:
+                        await FastAPICache.get_backend().set(key, pack(body, **meta), expire)
+                    except Exception as e:
+                        logger.warning(f"Error setting cache key '{key}': {e}")
+                    return meta, body, result
+                finally:
+                    if token:
+                        try:
+                            await recompute_locks.release(key, token)
+                        except Exception as e:
+                            logger.warning(f"Failed to release cache lock for {key}: {e}")
+
+            entry = None if request is not None and request.headers.get('Cache-Control') == 'no-cache' else await _load(key)
+            if entry is not None:
+                ttl, meta, body = entry
+                if key not in _inflight and should_refresh_early(meta.get('delta', 0), ttl, CacheConfig.early_refresh_beta):
+                    task, _ = _single_flight(key, lambda: produce(wait_for_peer=False))
+                    produced = await asyncio.shield(task)
+                    if produced is not None:
+                        metrics.inc(f'cache.{route}.early_refresh')
+                        return respond(*produced, 'MISS', expire)
+                metrics.inc(f'cache.{route}.hit')
+                return respond(meta, body, None, 'HIT', ttl)
+
+            task, coalesced = _single_flight(key, lambda: produce(wait_for_peer=True))
+            metrics.inc(f'cache.{route}.coalesced' if coalesced else f'cache.{route}.miss')
+            return respond(*await asyncio.shield(task), 'MISS', expire)
+
+        if response_param == INJECTED_RESPONSE:
+            parameters = list(signature.parameters.values())
+            parameters.append(Parameter(INJECTED_RESPONSE, Parameter.KEYWORD_ONLY, annotation=Response))
+            signature = signature.replace(parameters=parameters)
+        inner.__signature__ = signature  # type: ignore[attr-defined]
+        return inner
+    return wrapper
@@ -0,0 +1,42 @@
+import uuid
+from typing import Optional
+from redis import asyncio as aioredis
+from src.config import CacheConfig
+
+
+class LocalCacheLocks:
+
+    # a single process already coalesces through its in-flight futures
+    async def acquire(self, key: str, timeout: float) -> Optional[str]:
+        return key
+
+    async def release(self, key: str, token: str):
+        pass
+
+
+class RedisCacheLocks:
+
+    # delete the lock only if we still own it, it may have expired and been taken by someone else
+    release_script = "if redis.call('GET', KEYS[1]) == ARGV[1] then return redis.call('DEL', KEYS[1]) end return 0"
+
+    def __init__(self, url: str, prefix: str = 'cache-lock'):
+        self.redis = aioredis.from_url(url)
+        self.prefix = prefix
+
+    async def acquire(self, key: str, timeout: float) -> Optional[str]:
+        token = uuid.uuid4().hex
+        if await self.redis.set(f'{self.prefix}:{key}', token, nx=True, px=int(timeout * 1000)):
+            return token
+        return None
+
+    async def release(self, key: str, token: str):
+        await self.redis.eval(self.release_script, 1, f'{self.prefix}:{key}', token)
+
+
+def cache_locks():
+    if CacheConfig.tag_backend == 'redis':
+        return RedisCacheLocks(CacheConfig.redis_url)
+    return LocalCacheLocks()
+
+
+recompute_locks = cache_locks()
@@ -0,0 +1,181 @@
+import asyncio
+import time
+import uuid
+from collections import defaultdict
+from typing import Dict, Iterable, List, Optional, Set, Tuple
+from loguru import logger
+from redis import asyncio as aioredis
+from src.config import CacheConfig
+from src.utils.metrics import metrics
+from src.utils.near_cache import cache_bus
+
+
+class LocalTagVersions:
+
+    def __init__(self):
+        self._versions: Dict[str, int] = defaultdict(int)
+        # versions restart from 0 with the process, the epoch tells those generations apart
+        self.epoch = uuid.uuid4().hex
+
+    async def get_many(self, tags: List[str]) -> List[int]:
+        return [self._versions[tag] for tag in tags]
+
+    async def invalidate(self, tags: Iterable[str]):
+        for tag in tags:
+            self._versions[tag] += 1
+
+
+class RedisTagVersions:
+
+    def __init__(self, url: str, prefix: str = 'cache-tag'):
+        self.redis = aioredis.from_url(url)
+        self.prefix = prefix
+        self.epoch_key = f'{prefix}-epoch'
+        self.epoch = None
+
+    async def get_many(self, tags: List[str]) -> List[int]:
+        if not tags:
+            return []
+        # read with the versions so a flushed store (counters back at 0) is seen together with its new epoch
+        epoch, *values = await self.redis.mget([self.epoch_key, *(f'{self.prefix}:{tag}' for tag in tags)])
+        if epoch is None:
+            await self.redis.set(self.epoch_key, uuid.uuid4().hex, nx=True)
+            epoch = await self.redis.get(self.epoch_key)
+        self.epoch = epoch.decode() if isinstance(epoch, bytes) else epoch
+        return [int(value or 0) for value in values]
+
+    async def invalidate(self, tags: Iterable[str]):
+        async with self.redis.pipeline(transaction=False) as pipe:
+            for tag in tags:
+                pipe.incr(f'{self.prefix}:{tag}')
+            await pipe.execute()
+
+
+class MirroredTagVersions:
+
+    def __init__(self, store, bus, ttl: float):
+        self.store = store
+        self.bus = bus
+        self.ttl = ttl
+        self._mirror: Dict[str, Tuple[int, float]] = {}
+        bus.subscribe(self._on_message)
+
+    @property
+    def epoch(self):
+        return self.store.epoch
+
+    async def get_many(self, tags: List[str]) -> List[int]:
+        now = time.monotonic()
+        missing = [tag for tag in tags if tag not in self._mirror or now - self._mirror[tag][1] >= self.ttl]
+        if missing:
+            try:
+                for tag, version in zip(missing, await self.store.get_many(missing)):
+                    self._mirror[tag] = (version, now)
+            except Exception as e:
+                if any(tag not in self._mirror for tag in missing):
+                    raise
+                # the store is unreachable, keep serving near-cached entries under the last versions we saw
+                logger.warning(f"Cache tag store unavailable, using mirrored versions: {e}")
+                metrics.inc('cache.tags.stale')
+        return [self._mirror[tag][0] for tag in tags]
+
+    async def invalidate(self, tags: Iterable[str]):
+        tags = list(tags)
+        for tag in tags:
+            self._mirror.pop(tag, None)
+        await self.store.invalidate(tags)
+        await self.bus.publish({'tags': tags})
+
+    def _on_message(self, message: dict):
+        if message.get('reset'):
+            self._mirror.clear()
+        for tag in message.get('tags', ()):
+            self._mirror.pop(tag, None)
+
+
+# a cached entry's key embeds the versions of its tags and the store's epoch, so bumping a tag orphans every entry carrying it
+def tag_versions():
+    store = RedisTagVersions(CacheConfig.redis_url) if CacheConfig.tag_backend == 'redis' else LocalTagVersions()
+    if CacheConfig.near_enabled:
+        return MirroredTagVersions(store, cache_bus, CacheConfig.near_tag_ttl)
+    return store
+
+
+class TagInvalidator:
+    """Bumps tag versions after a commit, holding on to the tags it could not bump until the store takes them.
+
+    A lost bump would let entries cached before the write come back as current for the whole catalog TTL once
+    the store recovers, so failed tags are retried in the background and, until then, routes reading them
+    skip the cache in this worker.
+    """
+
+    def __init__(self, versions, retries: int, retry_delay: float, replay_interval: float):
+        self.versions = versions
+        self.retries = retries
+        self.retry_delay = retry_delay
+        self.replay_interval = replay_interval
+        self._pending: Set[str] = set()
+        self._task: Optional[asyncio.Task] = None
+
+    def is_pending(self, tags: Iterable[str]) -> bool:
+        return bool(self._pending) and any(tag in self._pending for tag in tags)
+
+    async def invalidate(self, tags: Iterable[str]):
+        tags = set(tags)
+        for attempt in range(self.retries + 1):
+            try:
+                await self.versions.invalidate(tags)
+                return
+            except Exception as e:
+                error = e
+            if attempt < self.retries:
+                await asyncio.sleep(self.retry_delay * 2 ** attempt)
+        self._pending |= tags
+        metrics.inc('cache.tags.deferred', len(tags))
+        logger.error(f"Failed to invalidate cache tags {sorted(tags)}, retrying in the background: {error}")
+
+    async def replay(self) -> bool:
+        if not self._pending:
+            return True
+        tags = set(self._pending)
+        try:
+            await self.versions.invalidate(tags)
+        except Exception as e:
+            logger.warning(f"Deferred invalidation of {len(tags)} cache tags failed again: {e}")
+            return False
+        self._pending -= tags
+        metrics.inc('cache.tags.replayed', len(tags))
+        logger.info(f"Invalidated {len(tags)} deferred cache tags")
+        return True
+
+    async def run(self):
+        while True:
+            await asyncio.sleep(self.replay_interval)
+            await self.replay()
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        # last chance for tags still pending, the process is going away with them
+        await self.replay()
+
+    async def stats(self) -> dict:
+        return {'pending': len(self._pending)}
+
+
+cache_tags = tag_versions()
+tag_invalidator = TagInvalidator(
+    cache_tags,
+    retries=CacheConfig.invalidate_retries,
+    retry_delay=CacheConfig.invalidate_retry_delay,
+    replay_interval=CacheConfig.invalidate_replay_interval,
+)
+metrics.register_collector('cache_tags', tag_invalidator.stats)
@@ -0,0 +1,119 @@
+import time
+from typing import Dict, Tuple
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool
+from src.config import EngineConfig
+from src.utils.metrics import metrics
+
+POOL_OPTIONS = ('pool_size', 'max_overflow', 'pool_timeout', 'pool_recycle', 'pool_pre_ping')
+
+
+class TimedQueuePool(AsyncAdaptedQueuePool):
+    """Queue pool that records how long checkouts wait for a free connection."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.checkouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            waited = time.perf_counter() - started
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool, keep the counters monotonic for whoever scrapes them
+        pool = super().recreate()
+        pool.checkouts, pool.wait_total, pool.wait_max = self.checkouts, self.wait_total, self.wait_max
+        return pool
+
+
+def engine_options(url: str, profile: str) -> Tuple[dict, Dict[str, object]]:
+    """Split a named profile into ``create_engine`` kwargs and the pragmas to run on each SQLite connection."""
+    parsed = make_url(url)
+    sqlite = parsed.get_backend_name() == 'sqlite'
+    if profile == 'auto':
+        profile = 'sqlite' if sqlite else 'server'
+    if profile not in EngineConfig.profiles:
+        raise ValueError(f"Unknown engine profile '{profile}', expected one of {sorted(EngineConfig.profiles)}")
+    settings = {**EngineConfig.profiles[profile], **EngineConfig.overrides}
+    pragmas = settings.get('pragmas', {}) if sqlite else {}
+    options = {name: settings[name] for name in POOL_OPTIONS if name in settings}
+    if sqlite and parsed.database in (None, '', ':memory:'):
+        # in-memory databases use a static pool that takes none of the sizing options
+        options = {}
+    statement_cache_size = settings.get('statement_cache_size')
+    if statement_cache_size is not None:
+        options['query_cache_size'] = statement_cache_size
+        if sqlite:
+            options['connect_args'] = {'cached_statements': statement_cache_size}
+        elif parsed.get_driver_name() == 'asyncpg':
+            options['connect_args'] = {'prepared_statement_cache_size': statement_cache_size}
+    return options, pragmas
+
+
+def _apply_pragmas(engine: Engine, pragmas: Dict[str, object]):
+    if not pragmas:
+        return
+
+    @event.listens_for(engine, 'connect')
+    def set_pragmas(dbapi_connection, _):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas.items():
+            cursor.execute(f'PRAGMA {name}={value}')
+        cursor.close()
+
+
+def build_async_engine(url: str, profile: str = EngineConfig.profile) -> AsyncEngine:
+    options, pragmas = engine_options(url, profile)
+    if 'pool_size' in options:
+        options['poolclass'] = TimedQueuePool
+    engine = create_async_engine(url, echo=False, **options)
+    _apply_pragmas(engine.sync_engine, pragmas)
+    return engine
+
+
+def build_sync_engine(url: str, profile: str = EngineConfig.profile) -> Engine:
+    options, pragmas = engine_options(url, profile)
+    engine = create_engine(url, echo=False, **options)
+    _apply_pragmas(engine, pragmas)
+    return engine
+
+
+class PoolStats:
+
+    def __init__(self):
+        self._engines: Dict[str, AsyncEngine] = {}
+
+    def register(self, name: str, engine: AsyncEngine):
+        self._engines[name] = engine
+
+    async def collect(self) -> dict:
+        result = {}
+        for name, engine in self._engines.items():
+            pool = engine.sync_engine.pool
+            if not isinstance(pool, TimedQueuePool):
+                continue
+            result[name] = {
+                'size': pool.size(),
+                'in_use': pool.checkedout(),
+                'idle': pool.checkedin(),
+                # negative while the pool is still filling up to pool_size
+                'overflow': max(pool.overflow(), 0),
+                'checkouts': pool.checkouts,
+                'checkout_wait_ms_total': round(pool.wait_total * 1000, 3),
+                'checkout_wait_ms_max': round(pool.wait_max * 1000, 3),
+            }
+        return result
+
+
+pool_stats = PoolStats()
+metrics.register_collector('db_pool', pool_stats.collect)
@@ -0,0 +1,182 @@
+import argparse
+import asyncio
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import Any, Callable, Optional
+import bcrypt
+from loguru import logger
+from passlib.hash import sha256_crypt
+from src.config import HashingConfig
+from src.utils.metrics import metrics
+
+
+class HasherOverloaded(Exception):
+    pass
+
+
+class PasswordContext:
+    """Hashes with one configured scheme and cost, verifies bcrypt and sha256_crypt hashes of any cost.
+
+    bcrypt goes through the ``bcrypt`` package directly, passlib 1.7 cannot drive bcrypt>=4.
+    """
+
+    schemes = ('bcrypt', 'sha256_crypt')
+    # costs are compared loosely so calibration noise, which differs between workers, does not trigger rehashes
+    rounds_tolerance = 0.25
+    # a bcrypt cost step doubles the work, one step either way is what separate calibrations disagree by
+    bcrypt_cost_tolerance = 1
+
+    def __init__(self, scheme: str, rounds: int):
+        if scheme not in self.schemes:
+            raise ValueError(f"Unsupported password hash scheme '{scheme}'")
+        self.scheme = scheme
+        self.rounds = rounds
+
+    def hash(self, password: str) -> str:
+        if self.scheme == 'bcrypt':
+            return bcrypt.hashpw(self._bcrypt_secret(password), bcrypt.gensalt(self.rounds)).decode()
+        return sha256_crypt.using(rounds=self.rounds).hash(password)
+
+    def verify(self, password: str, hashed: str) -> bool:
+        scheme = self.identify(hashed)
+        if scheme == 'bcrypt':
+            return bcrypt.checkpw(self._bcrypt_secret(password), hashed.encode())
+        if scheme == 'sha256_crypt':
+            return sha256_crypt.verify(password, hashed)
+        return False
+
+    def needs_update(self, hashed: str) -> bool:
+        if self.identify(hashed) != self.scheme:
+            return True
+        if self.scheme == 'bcrypt':
+            return abs(int(hashed.split('$')[2]) - self.rounds) > self.bcrypt_cost_tolerance
+        return abs(sha256_crypt.from_string(hashed).rounds - self.rounds) > self.rounds * self.rounds_tolerance
+
+    @staticmethod
+    def identify(hashed: str) -> Optional[str]:
+        if hashed.startswith(('$2a$', '$2b$', '$2y$')):
+            return 'bcrypt'
+        if hashed.startswith('$5$'):
+            return 'sha256_crypt'
+        return None
+
+    @staticmethod
+    def _bcrypt_secret(password: str) -> bytes:
+        # bcrypt only ever looked at the first 72 bytes, newer releases refuse longer input instead
+        return password.encode()[:72]
+
+
+def calibrate(scheme: str, target_ms: float) -> int:
+    """Pick the rounds whose single hash on this machine comes closest to ``target_ms``."""
+    def measure(rounds: int) -> float:
+        context = PasswordContext(scheme, rounds)
+        started = time.perf_counter()
+        context.hash('calibration-password')
+        return (time.perf_counter() - started) * 1000
+
+    if scheme == 'bcrypt':
+        # each bcrypt cost step doubles the work
+        rounds, elapsed = 4, measure(4)
+        while rounds < 31:
+            following = measure(rounds + 1)
+            if abs(following - target_ms) >= abs(elapsed - target_ms):
+                break
+            rounds, elapsed = rounds + 1, following
+        return rounds
+    probe = 20_000
+    per_round = min(measure(probe) for _ in range(3)) / probe
+    return max(1000, min(999_999_999, int(target_ms / per_round)))
+
+
+def tune(context: PasswordContext, target_ms: float):
+    context.rounds = calibrate(context.scheme, target_ms)
+    logger.info(f"Calibrated {context.scheme} to {context.rounds} rounds for {target_ms}ms per hash")
+
+
+pwd_context = PasswordContext(HashingConfig.scheme, HashingConfig.rounds)
+
+
+@lru_cache(maxsize=8)
+def _context(scheme: str, rounds: int) -> PasswordContext:
+    return PasswordContext(scheme, rounds)
+
+
+# run inside the pool's worker processes, which may not have seen the parent's calibration
+def _hash(password: str, scheme: str, rounds: int) -> str:
+    return _context(scheme, rounds).hash(password)
+
+
+def _verify(password: str, hashed: str) -> bool:
+    return pwd_context.verify(password, hashed)
+
+
+class PasswordHasher:
+
+    def __init__(self, offload: bool, workers: int, max_pending: int):
+        self.offload = offload
+        self.workers = workers
+        self.max_pending = max_pending
+        self.pending = 0
+        self._executor: Optional[ProcessPoolExecutor] = None
+        self._pid = os.getpid()
+
+    async def hash(self, password: str) -> str:
+        return await self._run(_hash, password, pwd_context.scheme, pwd_context.rounds)
+
+    async def verify(self, password: str, hashed: str) -> bool:
+        return await self._run(_verify, password, hashed)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+    async def stats(self) -> dict:
+        return {'pending': self.pending, 'workers': self.workers, 'max_pending': self.max_pending}
+
+    async def _run(self, fn: Callable[..., Any], *args: Any) -> Any:
+        if not self.offload:
+            return fn(*args)
+        # shed load instead of letting every request wait behind a login storm
+        if self.pending >= self.max_pending:
+            metrics.inc('password_hasher.rejected')
+            raise HasherOverloaded(f"{self.pending} password hashes already queued")
+        self.pending += 1
+        metrics.set('password_hasher.pending', self.pending)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self._pool(), fn, *args)
+        finally:
+            self.pending -= 1
+            metrics.set('password_hasher.pending', self.pending)
+
+    def _pool(self) -> ProcessPoolExecutor:
+        if self._executor is None or self._pid != os.getpid():
+            self._executor = ProcessPoolExecutor(max_workers=self.workers)
+            self._pid = os.getpid()
+            logger.info(f"Started password hashing pool with {self.workers} processes")
+        return self._executor
+
+
+password_hasher = PasswordHasher(HashingConfig.offload, HashingConfig.workers, HashingConfig.max_pending)
+metrics.register_collector('password_hasher', password_hasher.stats)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Pick password hash rounds for a target time per hash on this machine')
+    parser.add_argument('--scheme', choices=PasswordContext.schemes, default=HashingConfig.scheme)
+    parser.add_argument('--target-ms', type=float, default=HashingConfig.target_ms or 250.0)
+    args = parser.parse_args()
+
+    rounds = calibrate(args.scheme, args.target_ms)
+    context = PasswordContext(args.scheme, rounds)
+    started = time.perf_counter()
+    context.hash('calibration-password')
+    print(f'{args.scheme} at {rounds} rounds: {(time.perf_counter() - started) * 1000:.1f}ms per hash')
+    print(f'PASSWORD_HASH_SCHEME={args.scheme}')
+    print(f'PASSWORD_HASH_ROUNDS={rounds}')
+
+
+if __name__ == '__main__':
+    main()
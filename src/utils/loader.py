@@ -0,0 +1,35 @@
+from typing import Any, Dict, Hashable, Iterable, Optional, Set, Type
+from pydantic import BaseModel
+from loguru import logger
+from src.utils.repository import SQLAlchemyRepository
+
+
+class BatchLoader:
+
+    def __init__(self, repository: SQLAlchemyRepository, key: str = 'id', schema: Optional[Type[BaseModel]] = None):
+        self.repository = repository
+        self.key = key
+        self.schema = schema
+        self._cache: Dict[Hashable, Optional[Any]] = {}
+        self._pending: Set[Hashable] = set()
+
+    def prime(self, keys: Iterable[Hashable]):
+        self._pending.update(k for k in keys if k is not None and k not in self._cache)
+
+    async def load(self, key: Hashable) -> Optional[Any]:
+        return (await self.load_many([key])).get(key)
+
+    async def load_many(self, keys: Iterable[Hashable]) -> Dict[Hashable, Optional[Any]]:
+        keys = list(keys)
+        self.prime(keys)
+        if self._pending:
+            await self._dispatch()
+        return {k: self._cache.get(k) for k in keys}
+
+    async def _dispatch(self):
+        pending, self._pending = list(self._pending), set()
+        logger.debug(f"BatchLoader({self.repository.entity.__tablename__}.{self.key}): loading {len(pending)} keys in one batch")
+        for entity in await self.repository.get_many(pending, key=self.key, schema=self.schema):
+            self._cache[getattr(entity, self.key)] = entity
+        for k in pending:
+            self._cache.setdefault(k, None)
@@ -0,0 +1,155 @@
+from collections import defaultdict
+from typing import AsyncIterator, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+from src.config import MatchingConfig
+from src.utils.projection import ExecuterSkillsProjection, version_store
+from src.utils.unit_of_work import IUnitOfWork
+
+
+def score_executer(skills: dict, required: List[str]) -> float:
+    # reference per-row scorer: skill overlap first, capped experience breaks ties
+    overlap = 0
+    experience = 0
+    for title in required:
+        if title in skills:
+            overlap += 1
+            experience += min(max(skills[title], 0), MatchingConfig.experience_cap)
+    if not overlap:
+        return 0.0
+    return overlap + MatchingConfig.experience_weight * experience / (len(required) * MatchingConfig.experience_cap)
+
+
+class SkillPostings:
+    """Executers holding one skill, as parallel arrays of column and cell that only grow for this skill."""
+
+    __slots__ = ('cols', 'cells', 'size', 'dead')
+
+    def __init__(self, cols: Optional[np.ndarray] = None, cells: Optional[np.ndarray] = None):
+        self.cols = cols if cols is not None else np.empty(16, dtype=np.int64)
+        self.cells = cells if cells is not None else np.empty(16, dtype=np.uint8)
+        self.size = len(cols) if cols is not None else 0
+        self.dead = 0
+
+    @property
+    def live(self) -> int:
+        return self.size - self.dead
+
+    def append(self, col: int, cell: int):
+        if self.size == len(self.cols):
+            # amortized doubling of this skill's postings only, never of the whole projection
+            self.cols = np.concatenate([self.cols, np.empty(len(self.cols), dtype=self.cols.dtype)])
+            self.cells = np.concatenate([self.cells, np.empty(len(self.cells), dtype=self.cells.dtype)])
+        self.cols[self.size] = col
+        self.cells[self.size] = cell
+        self.size += 1
+
+    def remove(self, col: int):
+        # removed entries are zeroed in place and dropped once they make up half of the arrays
+        hits = np.flatnonzero((self.cols[:self.size] == col) & (self.cells[:self.size] > 0))
+        self.cells[hits] = 0
+        self.dead += len(hits)
+        if self.dead > 16 and self.dead * 2 > self.size:
+            live = self.cells[:self.size] > 0
+            self.cols, self.cells = self.cols[:self.size][live], self.cells[:self.size][live]
+            self.size, self.dead = len(self.cols), 0
+
+
+class MatchingEngine(ExecuterSkillsProjection):
+
+    name = 'matching_engine'
+
+    def __init__(self, enabled: bool, versions):
+        super().__init__(enabled, versions)
+        self._reset()
+
+    async def top_k(self, uow: IUnitOfWork, required: List[str], k: int) -> Optional[List[Tuple[int, float]]]:
+        if not await self.ensure_fresh(uow):
+            return None
+        return self.rank(required, k)
+
+    def rank(self, required: List[str], k: int) -> List[Tuple[int, float]]:
+        required = list(dict.fromkeys(required))
+        postings = [self._postings[title] for title in required if title in self._postings]
+        if not postings or not self._ids:
+            return []
+        # cells hold min(experience, cap) + 1, zero marks a removed entry
+        cols = np.concatenate([p.cols[:p.size] for p in postings])
+        cells = np.concatenate([p.cells[:p.size] for p in postings]).astype(np.float64)
+        weight = MatchingConfig.experience_weight / (len(required) * MatchingConfig.experience_cap)
+        scores = np.bincount(cols, weights=np.where(cells > 0, 1 + weight * (cells - 1), 0), minlength=len(self._ids))
+        candidates = np.flatnonzero(scores)
+        k = min(k, len(candidates))
+        if k <= 0:
+            return []
+        scores = scores[candidates]
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [(self._ids[candidates[i]], float(scores[i])) for i in top]
+
+    def build(self, rows: Iterable[Tuple[int, dict]]):
+        self._reset()
+        cols: Dict[str, List[int]] = defaultdict(list)
+        cells: Dict[str, List[int]] = defaultdict(list)
+        for executer_id, skills in rows:
+            if not skills:
+                continue
+            col = len(self._ids)
+            self._ids.append(executer_id)
+            self._cols[executer_id] = col
+            self._titles[col] = tuple(skills)
+            for title, experience in skills.items():
+                cols[title].append(col)
+                cells[title].append(self._cell(experience))
+        self._postings = {
+            title: SkillPostings(np.array(cols[title], dtype=np.int64), np.array(cells[title], dtype=np.uint8))
+            for title in cols
+        }
+
+    async def _build(self, batches: AsyncIterator[List[Tuple[int, dict]]]):
+        rows = []
+        async for batch in batches:
+            rows.extend(batch)
+        self.build(rows)
+
+    def _patch(self, executer_id: int, skills: dict):
+        col = self._cols.get(executer_id)
+        if col is None:
+            if not skills:
+                return
+            col = self._free.pop() if self._free else len(self._ids)
+            if col == len(self._ids):
+                self._ids.append(executer_id)
+            self._ids[col] = executer_id
+            self._cols[executer_id] = col
+        for title in self._titles.pop(col, ()):
+            postings = self._postings[title]
+            postings.remove(col)
+            if not postings.live:
+                # free-text titles come and go, only skills someone holds keep their postings
+                del self._postings[title]
+        if not skills:
+            del self._cols[executer_id]
+            self._ids[col] = -1
+            self._free.append(col)
+            return
+        self._titles[col] = tuple(skills)
+        for title, experience in skills.items():
+            postings = self._postings.get(title)
+            if postings is None:
+                postings = self._postings[title] = SkillPostings()
+            postings.append(col, self._cell(experience))
+
+    def _reset(self):
+        self._postings: Dict[str, SkillPostings] = {}
+        # column -> executer id, -1 for columns on the free list
+        self._ids: List[int] = []
+        self._cols: Dict[int, int] = {}
+        self._titles: Dict[int, Tuple[str, ...]] = {}
+        self._free: List[int] = []
+
+    @staticmethod
+    def _cell(experience: int) -> int:
+        return min(max(experience, 0), MatchingConfig.experience_cap) + 1
+
+
+matching_engine = MatchingEngine(MatchingConfig.enabled, version_store(MatchingEngine.name))
@@ -0,0 +1,33 @@
+from collections import defaultdict
+from typing import Awaitable, Callable, Dict
+from loguru import logger
+
+
+class Metrics:
+
+    def __init__(self):
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._collectors: Dict[str, Callable[[], Awaitable[dict]]] = {}
+
+    def inc(self, name: str, value: float = 1):
+        self._counters[name] += value
+
+    def set(self, name: str, value: float):
+        self._gauges[name] = value
+
+    def register_collector(self, name: str, collector: Callable[[], Awaitable[dict]]):
+        self._collectors[name] = collector
+
+    async def snapshot(self) -> dict:
+        result = {'counters': dict(self._counters), 'gauges': dict(self._gauges)}
+        for name, collector in self._collectors.items():
+            try:
+                result[name] = await collector()
+            except Exception as e:
+                logger.warning(f"Metrics collector '{name}' failed: {e}")
+                result[name] = None
+        return result
+
+
+metrics = Metrics()
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import time
+from collections import OrderedDict
+from typing import Callable, List, Optional, Tuple
+from fastapi_cache.types import Backend
+from loguru import logger
+from redis import asyncio as aioredis
+from src.config import CacheConfig
+from src.utils.metrics import metrics
+
+
+class NearCache:
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.bytes = 0
+        self._entries: OrderedDict[str, Tuple[float, bytes]] = OrderedDict()
+
+    def get(self, key: str) -> Optional[Tuple[int, bytes]]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        ttl = expires_at - time.monotonic()
+        if ttl <= 0:
+            self.discard(key)
+            return None
+        self._entries.move_to_end(key)
+        return int(ttl), value
+
+    def set(self, key: str, value: bytes, expire: Optional[int]):
+        self.discard(key)
+        size = len(key) + len(value)
+        if not expire or expire <= 0 or size > self.max_bytes:
+            return
+        self._entries[key] = (time.monotonic() + expire, value)
+        self.bytes += size
+        while len(self._entries) > self.max_entries or self.bytes > self.max_bytes:
+            oldest, (_, evicted) = self._entries.popitem(last=False)
+            self.bytes -= len(oldest) + len(evicted)
+            metrics.inc('cache.near.evicted')
+
+    def discard(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= len(key) + len(entry[1])
+
+    def clear(self, prefix: str = ''):
+        for key in [key for key in self._entries if key.startswith(prefix)]:
+            self.discard(key)
+
+    async def stats(self) -> dict:
+        return {'entries': len(self._entries), 'bytes': self.bytes}
+
+
+class LocalInvalidationBus:
+
+    def __init__(self):
+        self._subscribers: List[Callable[[dict], None]] = []
+
+    def subscribe(self, callback: Callable[[dict], None]):
+        self._subscribers.append(callback)
+
+    async def publish(self, message: dict):
+        self._dispatch(message)
+
+    async def start(self):
+        pass
+
+    async def stop(self):
+        pass
+
+    def _dispatch(self, message: dict):
+        for callback in self._subscribers:
+            try:
+                callback(message)
+            except Exception as e:
+                logger.warning(f"Cache invalidation subscriber failed: {e}")
+
+
+class RedisInvalidationBus(LocalInvalidationBus):
+
+    def __init__(self, url: str, channel: str, retry_interval: float = 1.0):
+        super().__init__()
+        self.redis = aioredis.from_url(url)
+        self.channel = channel
+        self.retry_interval = retry_interval
+        self._task: Optional[asyncio.Task] = None
+
+    async def publish(self, message: dict):
+        await self.redis.publish(self.channel, json.dumps(message))
+
+    async def start(self):
+        self._task = asyncio.create_task(self.listen())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def listen(self):
+        while True:
+            try:
+                async with self.redis.pubsub() as pubsub:
+                    await pubsub.subscribe(self.channel)
+                    # anything published while we were not subscribed is lost, drop what it could have invalidated
+                    self._dispatch({'reset': True})
+                    async for message in pubsub.listen():
+                        if message['type'] == 'message':
+                            self._dispatch(json.loads(message['data']))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.warning(f"Cache invalidation channel lost, resubscribing: {e}")
+                await asyncio.sleep(self.retry_interval)
+
+
+def invalidation_bus():
+    if CacheConfig.tag_backend == 'redis':
+        return RedisInvalidationBus(CacheConfig.redis_url, CacheConfig.invalidation_channel)
+    return LocalInvalidationBus()
+
+
+class TwoTierBackend(Backend):
+
+    def __init__(self, remote: Backend, near: NearCache, bus):
+        self.remote = remote
+        self.near = near
+        self.bus = bus
+        bus.subscribe(self._on_message)
+
+    async def get_with_ttl(self, key: str) -> Tuple[int, Optional[bytes]]:
+        entry = self.near.get(key)
+        if entry is not None:
+            metrics.inc('cache.near.hit')
+            return entry
+        metrics.inc('cache.near.miss')
+        ttl, value = await self.remote.get_with_ttl(key)
+        if value is not None:
+            self.near.set(key, value, ttl)
+        return ttl, value
+
+    async def get(self, key: str) -> Optional[bytes]:
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key: str, value: bytes, expire: Optional[int] = None):
+        # fill the near tier first so this worker keeps serving the entry even if Redis is down
+        self.near.set(key, value, expire)
+        await self.remote.set(key, value, expire)
+
+    async def clear(self, namespace: Optional[str] = None, key: Optional[str] = None) -> int:
+        message = {'clear': {'namespace': namespace, 'key': key}}
+        self._on_message(message)
+        await self.bus.publish(message)
+        return await self.remote.clear(namespace, key)
+
+    def _on_message(self, message: dict):
+        clear = message.get('clear')
+        if not clear:
+            return
+        if clear.get('key'):
+            self.near.discard(clear['key'])
+        else:
+            self.near.clear(f"{clear['namespace']}:" if clear.get('namespace') else '')
+
+
+near_cache = NearCache(CacheConfig.near_max_entries, CacheConfig.near_max_bytes)
+cache_bus = invalidation_bus()
+metrics.register_collector('near_cache', near_cache.stats)
@@ -0,0 +1,107 @@
+import asyncio
+from datetime import timedelta
+from typing import Dict, List, Optional
+from loguru import logger
+from src.config import OutboxConfig, celery
+from src.schemas.outbox import OutboxMessageSchema
+from src.utils.metrics import metrics
+from src.utils.unit_of_work import UnitOfWork
+from src.workers.tasks import BATCH_TASKS
+
+
+class OutboxRelay:
+
+    def __init__(self, batch_size: int, interval: float, lease: timedelta, max_attempts: int, linger: float = 0.0,
+                 batch_tasks: Optional[Dict[str, str]] = None):
+        self.batch_size = batch_size
+        self.interval = interval
+        self.lease = lease
+        self.max_attempts = max_attempts
+        self.linger = linger
+        self.batch_tasks = batch_tasks or {}
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def notify(self):
+        self._wakeup.set()
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+        logger.info("Outbox relay started")
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+            logger.info("Outbox relay stopped")
+
+    async def run(self):
+        while True:
+            try:
+                published = await self.relay_once()
+            except Exception as e:
+                logger.exception(f"Outbox relay iteration failed: {e}")
+                published = 0
+            if published == self.batch_size:
+                continue
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=self.interval)
+                if self.linger:
+                    await asyncio.sleep(self.linger)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def relay_once(self) -> int:
+        async with UnitOfWork() as uow:
+            messages = await uow.outbox.claim(self.batch_size, self.lease, self.max_attempts)
+            await uow.commit()
+        if not messages:
+            return 0
+        # the broker client is blocking, keep it off the event loop
+        published = await asyncio.to_thread(self._publish, messages)
+        if published:
+            async with UnitOfWork() as uow:
+                await uow.outbox.remove_many(published)
+                await uow.commit()
+        metrics.inc('outbox.published', len(published))
+        if len(published) < len(messages):
+            metrics.inc('outbox.publish_failures', len(messages) - len(published))
+            logger.warning(f"Outbox relay published {len(published)}/{len(messages)} messages, the rest retry after the lease expires")
+            dead = [message for message in messages if message.id not in published and message.attempts >= self.max_attempts]
+            if dead:
+                metrics.inc('outbox.dead', len(dead))
+                logger.error(f"Outbox messages out of attempts, parked: {[(message.id, message.task) for message in dead]}")
+        return len(published)
+
+    def _publish(self, messages: List[OutboxMessageSchema]) -> List[int]:
+        published = []
+        batches: Dict[str, List[OutboxMessageSchema]] = {}
+        single = []
+        for message in messages:
+            if message.task in self.batch_tasks:
+                batches.setdefault(self.batch_tasks[message.task], []).append(message)
+            else:
+                single.append(message)
+        try:
+            with celery.producer_or_acquire() as producer:
+                for task, batch in batches.items():
+                    celery.send_task(task, args=[[message.payload for message in batch]], producer=producer)
+                    published.extend(message.id for message in batch)
+                    metrics.inc('outbox.batched', len(batch))
+                for message in single:
+                    celery.send_task(message.task, kwargs=message.payload, producer=producer)
+                    published.append(message.id)
+        except Exception as e:
+            logger.error(f"Outbox publish failed after {len(published)} messages: {e}")
+        return published
+
+
+outbox_relay = OutboxRelay(
+    OutboxConfig.batch_size, OutboxConfig.interval, timedelta(seconds=OutboxConfig.lease_seconds),
+    OutboxConfig.max_attempts, linger=OutboxConfig.linger, batch_tasks=BATCH_TASKS,
+)
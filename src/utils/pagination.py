@@ -0,0 +1,18 @@
+import base64
+import json
+from datetime import datetime
+from typing import Tuple
+
+
+def encode_cursor(created_at: datetime, entity_id: int) -> str:
+    raw = json.dumps([created_at.isoformat(), entity_id], separators=(',', ':'))
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip('=')
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        created_at, entity_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        return datetime.fromisoformat(created_at), int(entity_id)
+    except Exception as e:
+        raise ValueError(f'Invalid cursor: {cursor}') from e
@@ -0,0 +1,109 @@
+import asyncio
+from abc import ABC, abstractmethod
+from typing import AsyncIterator, List, Tuple
+from loguru import logger
+from redis import asyncio as aioredis
+from src.config import ProjectionConfig
+from src.utils.unit_of_work import IUnitOfWork, UnitOfWork
+
+
+class LocalVersionStore:
+
+    def __init__(self):
+        self._value = 0
+
+    async def get(self) -> int:
+        return self._value
+
+    async def incr(self) -> int:
+        self._value += 1
+        return self._value
+
+
+class RedisVersionStore:
+
+    def __init__(self, url: str, key: str):
+        self.redis = aioredis.from_url(url)
+        self.key = key
+
+    async def get(self) -> int:
+        return int(await self.redis.get(self.key) or 0)
+
+    async def incr(self) -> int:
+        return int(await self.redis.incr(self.key))
+
+
+def version_store(name: str):
+    if ProjectionConfig.version_backend == 'redis':
+        return RedisVersionStore(ProjectionConfig.redis_url, f'{name}:version')
+    return LocalVersionStore()
+
+
+# in-process view of executers.skills, patched on writes and versioned across workers
+class ExecuterSkillsProjection(ABC):
+
+    name = 'projection'
+
+    def __init__(self, enabled: bool, versions):
+        self.enabled = enabled
+        self.versions = versions
+        self.version = -1
+        self._lock = asyncio.Lock()
+
+    @property
+    def ready(self) -> bool:
+        return self.version >= 0
+
+    async def rebuild(self, uow: IUnitOfWork):
+        async with self._lock:
+            # read the shared version first so writes racing with the scan mark us stale again
+            version = await self.versions.get()
+            if uow.read_only:
+                # a read-only unit of work may be on a replica that lags behind the version read above
+                async with UnitOfWork() as primary:
+                    await self._build(primary.executers.iter_skills())
+            else:
+                await self._build(uow.executers.iter_skills())
+            self.version = version
+            logger.info(f"{self.name} rebuilt at version={version}")
+
+    async def ensure_fresh(self, uow: IUnitOfWork) -> bool:
+        if not self.enabled:
+            return False
+        try:
+            if not self.ready or await self.versions.get() != self.version:
+                logger.info(f"{self.name} stale (local version={self.version}), rebuilding")
+                await self.rebuild(uow)
+            return True
+        except Exception as e:
+            logger.warning(f"{self.name} unavailable: {e}")
+            return False
+
+    async def update(self, executer_id: int, skills: dict):
+        if not self.enabled or not self.ready:
+            return
+        self._patch(executer_id, skills)
+        await self._bump()
+
+    async def remove(self, executer_id: int):
+        await self.update(executer_id, {})
+
+    @abstractmethod
+    async def _build(self, batches: AsyncIterator[List[Tuple[int, dict]]]):
+        pass
+
+    @abstractmethod
+    def _patch(self, executer_id: int, skills: dict):
+        pass
+
+    async def _bump(self):
+        try:
+            shared = await self.versions.incr()
+        except Exception as e:
+            logger.warning(f"{self.name} version bump failed, forcing rebuild: {e}")
+            self.version = -1
+            return
+        if shared == self.version + 1:
+            self.version = shared
+        else:
+            logger.info(f"{self.name} out of sync with other workers (local={self.version}, shared={shared})")
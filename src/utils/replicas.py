@@ -0,0 +1,190 @@
+import argparse
+import asyncio
+import itertools
+import sqlite3
+import time
+from contextvars import ContextVar
+from typing import Dict, FrozenSet, Iterable, List, Optional
+from loguru import logger
+from sqlalchemy import text
+from sqlalchemy.exc import InterfaceError, OperationalError
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession, async_sessionmaker
+from src.config import DatabaseConfig, ReplicaConfig
+from src.connect import async_session_maker, replica_engines
+from src.utils.metrics import metrics
+from src.utils.near_cache import cache_bus
+
+# what the current request reads or writes, e.g. 'user:5' or the cache tags of the route being computed
+request_scopes: ContextVar[FrozenSet[str]] = ContextVar('request_scopes', default=frozenset())
+
+
+def track(*scopes: str):
+    request_scopes.set(request_scopes.get() | frozenset(scopes))
+
+
+class ReplicaSession(AsyncSession):
+    """Read-only session on a replica that moves to the primary when a statement fails on the replica."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._primary: Optional[AsyncSession] = None
+
+    async def execute(self, statement, *args, **kwargs):
+        if self._primary is None:
+            try:
+                return await super().execute(statement, *args, **kwargs)
+            except (InterfaceError, OperationalError) as e:
+                # the replica went away under the request, take it out and answer from the primary instead of a 500
+                replica_router.mark_failed(self.info['replica'])
+                metrics.inc('db.replicas.retried_on_primary')
+                logger.warning(f"Read failed on replica {self.info['replica'].name}, retrying on the primary: {e}")
+                self._primary = async_session_maker(autoflush=False)
+        return await self._primary.execute(statement, *args, **kwargs)
+
+    async def close(self):
+        if self._primary is not None:
+            await self._primary.close()
+            self._primary = None
+        await super().close()
+
+
+class Replica:
+
+    def __init__(self, engine: AsyncEngine):
+        self.engine = engine
+        self.name = engine.url.render_as_string(hide_password=True)
+        self.session_maker = async_sessionmaker(bind=engine, expire_on_commit=False, class_=ReplicaSession, info={'replica': self})
+        self.healthy = True
+
+
+class ReplicaRouter:
+
+    def __init__(self, engines: List[AsyncEngine], bus, window: float, health_interval: float, health_timeout: float):
+        self.replicas = [Replica(engine) for engine in engines]
+        self.bus = bus
+        self.window = window
+        self.health_interval = health_interval
+        self.health_timeout = health_timeout
+        self._next = itertools.count()
+        self._written: Dict[str, float] = {}
+        self._task: Optional[asyncio.Task] = None
+        bus.subscribe(self._on_message)
+
+    @property
+    def enabled(self) -> bool:
+        return bool(self.replicas)
+
+    def choose(self) -> Optional[Replica]:
+        """Pick the replica for a read-only unit of work, ``None`` means read from the primary."""
+        if not self.replicas:
+            return None
+        if self._recently_written(request_scopes.get()):
+            metrics.inc('db.replicas.read_your_writes')
+            return None
+        # round-robin, skipping replicas the health check took out
+        for _ in range(len(self.replicas)):
+            replica = self.replicas[next(self._next) % len(self.replicas)]
+            if replica.healthy:
+                metrics.inc('db.replicas.reads')
+                return replica
+        metrics.inc('db.replicas.fallback')
+        return None
+
+    def mark_failed(self, replica: Replica):
+        if replica.healthy:
+            logger.warning(f"Replica {replica.name} failed, reading from the others until it passes a health check")
+        replica.healthy = False
+
+    async def mark_written(self, scopes: Iterable[str]):
+        if not self.replicas:
+            return
+        scopes = list(scopes)
+        if not scopes:
+            return
+        self._mark(scopes)
+        try:
+            await self.bus.publish({'written': scopes})
+        except Exception as e:
+            logger.warning(f"Failed to broadcast write scopes, other workers may read them from a lagging replica: {e}")
+
+    async def check(self, replica: Replica) -> bool:
+        try:
+            # connecting is what hangs on an unreachable host, so it counts against the timeout too
+            await asyncio.wait_for(self._ping(replica.engine), self.health_timeout)
+        except Exception as e:
+            if replica.healthy:
+                logger.warning(f"Replica {replica.name} failed its health check: {e}")
+            replica.healthy = False
+            return False
+        if not replica.healthy:
+            logger.info(f"Replica {replica.name} is back")
+        replica.healthy = True
+        return True
+
+    @staticmethod
+    async def _ping(engine: AsyncEngine):
+        async with engine.connect() as connection:
+            await connection.execute(text('SELECT 1'))
+
+    async def run(self):
+        while True:
+            await asyncio.gather(*(self.check(replica) for replica in self.replicas))
+            await asyncio.sleep(self.health_interval)
+
+    def start(self):
+        if self.replicas:
+            self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def stats(self) -> dict:
+        return {replica.name: int(replica.healthy) for replica in self.replicas}
+
+    def _recently_written(self, scopes: FrozenSet[str]) -> bool:
+        now = time.monotonic()
+        return any(self._written.get(scope, 0) > now for scope in scopes)
+
+    def _mark(self, scopes: Iterable[str]):
+        now = time.monotonic()
+        if len(self._written) > ReplicaConfig.max_tracked_scopes:
+            self._written = {scope: until for scope, until in self._written.items() if until > now}
+        for scope in scopes:
+            self._written[scope] = now + self.window
+
+    def _on_message(self, message: dict):
+        if message.get('written'):
+            self._mark(message['written'])
+
+
+replica_router = ReplicaRouter(
+    replica_engines, cache_bus,
+    window=ReplicaConfig.read_your_writes,
+    health_interval=ReplicaConfig.health_interval,
+    health_timeout=ReplicaConfig.health_timeout,
+)
+metrics.register_collector('replicas', replica_router.stats)
+
+
+def copy_sqlite(source_url: str, target_url: str):
+    """Snapshot a SQLite database into another file, used to stand in for a replica locally."""
+    with sqlite3.connect(make_url(source_url).database) as source, sqlite3.connect(make_url(target_url).database) as target:
+        source.backup(target)
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Refresh the SQLite files listed in DATABASE_REPLICA_URLS from the primary')
+    parser.parse_args()
+    for url in DatabaseConfig.REPLICA_URLS:
+        if make_url(url).get_backend_name() != 'sqlite':
+            print(f'skipping {url}, only SQLite replicas are copied')
+            continue
+        copy_sqlite(DatabaseConfig.SYNC_DATABASE_URL, url)
+        print(f'copied {DatabaseConfig.SYNC_DATABASE_URL} -> {url}')
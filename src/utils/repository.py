@@ -1,8 +1,54 @@
 from abc import ABC, abstractmethod
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, delete, update, insert
-from typing import List, Any, Optional, Type
+from sqlalchemy.orm import Session
+from pydantic import BaseModel
+from sqlalchemy import Column, Dialect, Insert, Result, Row, Select, select, delete, update, insert, literal, tuple_
+from sqlalchemy.dialects import mysql, postgresql, sqlite
+from typing import Dict, Iterator, List, Any, Optional, Sequence, Type
+from src.config import PaginationConfig
+from src.schemas.pagination import PageSchema
 from src.utils.models import Base
+from src.utils.pagination import decode_cursor, encode_cursor
+
+def insert_ignore(entity: Type[Base], dialect_name: str, index_elements: List[str]) -> Insert:
+    # INSERT that silently skips rows violating the given unique constraint
+    if dialect_name == 'sqlite':
+        return sqlite.insert(entity).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect_name == 'postgresql':
+        return postgresql.insert(entity).on_conflict_do_nothing(index_elements=index_elements)
+    if dialect_name in ('mysql', 'mariadb'):
+        return mysql.insert(entity).prefix_with('IGNORE')
+    raise NotImplementedError(f'insert_ignore is not supported for dialect {dialect_name}')
+
+
+def upsert_many_stmt(entity: Type[Base], dialect: Dialect, index_elements: List[str], rows: Sequence[Dict[str, Any]]) -> Insert:
+    stmt = insert_ignore(entity, dialect.name, index_elements).values(list(rows))
+    if dialect.insert_returning:
+        stmt = stmt.returning(*entity.__table__.primary_key.columns)
+    return stmt
+
+
+def inserted_count(result: Result, dialect: Dialect) -> int:
+    # RETURNING only yields rows that were actually inserted; rowcount is the fallback for MySQL
+    return len(result.all()) if dialect.insert_returning else result.rowcount
+
+
+def projected_columns(entity: Type[Base], schema: Type[BaseModel]) -> List[Column]:
+    return [entity.__table__.c[name] for name in schema.model_fields if name in entity.__table__.c]
+
+
+def construct(schema: Type[BaseModel], rows: Sequence[Row]) -> List[BaseModel]:
+    # rows come straight from typed columns, so skip validation; NULLs stay None, fields without a column take their default
+    if not rows:
+        return []
+    fields = [(i, name) for i, name in enumerate(rows[0]._fields) if name in schema.model_fields]
+    return [schema.model_construct(**{name: row[i] for i, name in fields}) for row in rows]
+
+
+def chunks(rows: Sequence[Any], size: int) -> Iterator[Sequence[Any]]:
+    for start in range(0, len(rows), size):
+        yield rows[start:start + size]
+
 
 class AbstractRepository(ABC):
 
@@ -10,14 +56,30 @@ class AbstractRepository(ABC):
     def add(self, entity):
         pass
 
+    @abstractmethod
+    async def add_many(self, entities):
+        pass
+
+    @abstractmethod
+    async def upsert_many(self, rows, index_elements):
+        pass
+
     @abstractmethod
     async def get(self, entity_id):
         pass
 
+    @abstractmethod
+    async def get_many(self, values, key='id'):
+        pass
+
     @abstractmethod
     async def list(self):
         pass
 
+    @abstractmethod
+    async def list_page(self, limit: int, cursor: Optional[str] = None, **kwargs):
+        pass
+
     @abstractmethod
     async def remove(self, entity):
         pass
@@ -30,6 +92,7 @@ class AbstractRepository(ABC):
 class SQLAlchemyRepository(AbstractRepository):
 
     entity: Type[Base]
+    batch_size: int = 500
 
     def __init__(self, session: AsyncSession):
         self.session = session
@@ -39,17 +102,84 @@ class SQLAlchemyRepository(AbstractRepository):
         result = await self.session.execute(stmt)
         entity = result.scalar_one_or_none()
         return entity.to_schema()
+
+    async def add_many(self, entities: Sequence[Any]) -> List[Any]:
+        created = []
+        for chunk in chunks(entities, self.batch_size):
+            stmt = insert(self.entity).values([entity.__dict__ for entity in chunk]).returning(self.entity)
+            result = await self.session.execute(stmt)
+            created.extend(entity.to_schema() for entity in result.scalars().all())
+        return created
+
+    async def upsert_many(self, rows: Sequence[Dict[str, Any]], index_elements: List[str]) -> int:
+        dialect = self.session.get_bind().dialect
+        created = 0
+        for chunk in chunks(rows, self.batch_size):
+            result = await self.session.execute(upsert_many_stmt(self.entity, dialect, index_elements, chunk))
+            created += inserted_count(result, dialect)
+        return created
     
-    async def get(self, **kwargs) -> Optional[Any]:
+    async def get(self, schema: Optional[Type[BaseModel]] = None, **kwargs) -> Optional[Any]:
+        if schema is not None:
+            stmt = select(*projected_columns(self.entity, schema)).filter_by(**kwargs)
+            row = (await self.session.execute(stmt)).first()
+            return construct(schema, [row])[0] if row else None
         stmt = select(self.entity).filter_by(**kwargs)
         result = await self.session.execute(stmt)
         entity = result.scalar_one_or_none()
         return entity.to_schema() if entity else None
 
+    async def get_many(self, values: Sequence[Any], key: str = 'id', schema: Optional[Type[BaseModel]] = None) -> List[Any]:
+        """Load rows by ``key``; with ``schema`` only its columns are selected and rows skip the ORM entirely."""
+        column = getattr(self.entity, key)
+        entities = []
+        for chunk in chunks(values, self.batch_size):
+            if schema is not None:
+                result = await self.session.execute(select(*projected_columns(self.entity, schema)).where(column.in_(chunk)))
+                entities.extend(construct(schema, result.all()))
+                continue
+            stmt = select(self.entity).where(column.in_(chunk))
+            result = await self.session.execute(stmt)
+            entities.extend(entity.to_schema() for entity in result.scalars().all())
+        return entities
+
     async def list(self, **kwargs) -> List[Any]:
         stmt = select(self.entity).filter_by(**kwargs)
         result = await self.session.execute(stmt)
         return [entity.to_schema() for entity in result.scalars().all()]
+
+    async def list_page(self, limit: int, cursor: Optional[str] = None, schema: Optional[Type[BaseModel]] = None, **kwargs) -> PageSchema:
+        if schema is not None:
+            # the cursor columns ride along after the projected ones
+            columns = projected_columns(self.entity, schema)
+            stmt = select(*columns, self.entity.created_at.label('_created_at'), self.entity.id.label('_id')).filter_by(**kwargs) # type: ignore
+            return await self._fetch_page(stmt, limit, cursor, schema)
+        stmt = select(self.entity).filter_by(**kwargs)
+        return await self._fetch_page(stmt, limit, cursor)
+
+    async def _fetch_page(self, stmt: Select, limit: int, cursor: Optional[str], schema: Optional[Type[BaseModel]] = None) -> PageSchema:
+        # keyset pagination over (created_at, id): every page is an index range scan
+        limit = max(1, min(limit, PaginationConfig.max_limit))
+        if cursor:
+            created_at, entity_id = decode_cursor(cursor)
+            stmt = stmt.where(tuple_(self.entity.created_at, self.entity.id) > tuple_(created_at, entity_id)) # type: ignore
+        stmt = stmt.order_by(self.entity.created_at, self.entity.id).limit(limit + 1) # type: ignore
+        result = await self.session.execute(stmt)
+        if schema is not None:
+            rows = result.all()
+            next_cursor = None
+            if len(rows) > limit:
+                rows = rows[:limit]
+                next_cursor = encode_cursor(rows[-1]._created_at, rows[-1]._id)
+            return PageSchema(items=construct(schema, rows), next_cursor=next_cursor)
+        return self._to_page(result.scalars().all(), limit)
+
+    def _to_page(self, entities: Sequence[Any], limit: int) -> PageSchema:
+        next_cursor = None
+        if len(entities) > limit:
+            entities = entities[:limit]
+            next_cursor = encode_cursor(entities[-1].created_at, entities[-1].id)
+        return PageSchema(items=[entity.to_schema() for entity in entities], next_cursor=next_cursor)
     
     async def remove(self, entity):
         stmt = delete(self.entity).filter_by(id=entity.id)
@@ -59,4 +189,45 @@ class SQLAlchemyRepository(AbstractRepository):
         stmt = update(self.entity).filter_by(id=entity_id).values(**kwargs).returning(self.entity)
         result = await self.session.execute(stmt)
         entity = result.scalar_one_or_none()
-        return entity.to_schema() if entity else None
\ No newline at end of file
+        return entity.to_schema() if entity else None
+
+    async def update_where(self, filters: Dict[str, Any], **values) -> Optional[Any]:
+        """Update the row matching every filter in one statement, ``None`` when nothing matched."""
+        stmt = update(self.entity).filter_by(**filters).values(**values).returning(self.entity)
+        result = await self.session.execute(stmt)
+        entity = result.scalar_one_or_none()
+        return entity.to_schema() if entity else None
+
+    async def remove_where(self, **filters) -> bool:
+        stmt = delete(self.entity).filter_by(**filters).returning(self.entity.id) # type: ignore
+        result = await self.session.execute(stmt)
+        return result.first() is not None
+
+    async def exists(self, **filters) -> bool:
+        stmt = select(literal(1)).select_from(self.entity).filter_by(**filters).limit(1)
+        result = await self.session.execute(stmt)
+        return result.first() is not None
+
+
+class SyncSQLAlchemyRepository:
+
+    entity: Type[Base]
+    batch_size: int = 500
+
+    def __init__(self, session: Session):
+        self.session = session
+
+    def add_many(self, entities: Sequence[Any]) -> List[Any]:
+        created = []
+        for chunk in chunks(entities, self.batch_size):
+            stmt = insert(self.entity).values([entity.__dict__ for entity in chunk]).returning(self.entity)
+            created.extend(entity.to_schema() for entity in self.session.execute(stmt).scalars().all())
+        return created
+
+    def upsert_many(self, rows: Sequence[Dict[str, Any]], index_elements: List[str]) -> int:
+        dialect = self.session.get_bind().dialect
+        created = 0
+        for chunk in chunks(rows, self.batch_size):
+            result = self.session.execute(upsert_many_stmt(self.entity, dialect, index_elements, chunk))
+            created += inserted_count(result, dialect)
+        return created
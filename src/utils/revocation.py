@@ -0,0 +1,165 @@
+import asyncio
+import hashlib
+import math
+import time
+from typing import Dict, Iterable, List, Optional
+from loguru import logger
+from redis import asyncio as aioredis
+from src.config import RevocationConfig
+from src.utils.metrics import metrics
+from src.utils.near_cache import cache_bus
+from src.utils.token_cache import verified_tokens
+
+
+class BloomFilter:
+
+    def __init__(self, capacity: int, error_rate: float):
+        self.size = max(8, int(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def add(self, item: str):
+        for position in self._positions(item):
+            self._bits[position >> 3] |= 1 << (position & 7)
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[position >> 3] & (1 << (position & 7)) for position in self._positions(item))
+
+    def _positions(self, item: str) -> Iterable[int]:
+        # double hashing over one digest instead of k independent hash functions
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        first, second = int.from_bytes(digest[:8], 'little'), int.from_bytes(digest[8:], 'little') | 1
+        return ((first + i * second) % self.size for i in range(self.hashes))
+
+
+class LocalRevocationStore:
+
+    def __init__(self):
+        self._revoked: Dict[str, float] = {}
+
+    async def add(self, jti: str, exp: float) -> bool:
+        added = jti not in self._revoked
+        self._revoked[jti] = exp
+        return added
+
+    async def contains(self, jti: str) -> bool:
+        return self._revoked.get(jti, 0) > time.time()
+
+    async def active(self) -> List[str]:
+        now = time.time()
+        self._revoked = {jti: exp for jti, exp in self._revoked.items() if exp > now}
+        return list(self._revoked)
+
+
+class RedisRevocationStore:
+
+    # members are jtis scored by their token's exp, nothing needs remembering after that
+    key = 'auth:revoked-jti'
+
+    def __init__(self, url: str):
+        self.redis = aioredis.from_url(url)
+
+    async def add(self, jti: str, exp: float) -> bool:
+        return bool(await self.redis.zadd(self.key, {jti: exp}, nx=True))
+
+    async def contains(self, jti: str) -> bool:
+        exp = await self.redis.zscore(self.key, jti)
+        return exp is not None and exp > time.time()
+
+    async def active(self) -> List[str]:
+        async with self.redis.pipeline(transaction=True) as pipe:
+            pipe.zremrangebyscore(self.key, '-inf', time.time())
+            pipe.zrange(self.key, 0, -1)
+            _, members = await pipe.execute()
+        return [member.decode() for member in members]
+
+
+def revocation_store():
+    if RevocationConfig.backend == 'redis':
+        return RedisRevocationStore(RevocationConfig.redis_url)
+    return LocalRevocationStore()
+
+
+class TokenRevocations:
+
+    def __init__(self, store, bus, capacity: int, error_rate: float, sync_interval: float):
+        self.store = store
+        self.bus = bus
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.bloom = BloomFilter(capacity, error_rate)
+        self._marked_during_sync: Optional[set] = None
+        self._task: Optional[asyncio.Task] = None
+        bus.subscribe(self._on_message)
+
+    async def revoke(self, jti: str, exp: float) -> bool:
+        added = await self.store.add(jti, exp)
+        self._mark(jti)
+        try:
+            await self.bus.publish({'revoked': [jti]})
+        except Exception as e:
+            logger.warning(f"Failed to broadcast revocation, other workers pick it up on their next sync: {e}")
+        return added
+
+    async def is_revoked(self, jti: str) -> bool:
+        # the filter has no false negatives, so the common case never leaves the process
+        if jti not in self.bloom:
+            metrics.inc('auth.revocation.filtered')
+            return False
+        metrics.inc('auth.revocation.lookups')
+        try:
+            return await self.store.contains(jti)
+        except Exception as e:
+            logger.error(f"Revocation store unavailable, rejecting possibly revoked token: {e}")
+            return True
+
+    async def sync(self):
+        self._marked_during_sync = set()
+        try:
+            jtis = await self.store.active()
+            bloom = BloomFilter(max(self.capacity, 2 * len(jtis)), self.error_rate)
+            for jti in (*jtis, *self._marked_during_sync):
+                bloom.add(jti)
+            self.bloom = bloom
+        finally:
+            self._marked_during_sync = None
+        metrics.set('auth.revocation.active', len(jtis))
+
+    async def run(self):
+        while True:
+            try:
+                await self.sync()
+            except Exception as e:
+                logger.warning(f"Revocation filter sync failed: {e}")
+            await asyncio.sleep(self.sync_interval)
+
+    def start(self):
+        self._task = asyncio.create_task(self.run())
+
+    async def stop(self):
+        if self._task:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def _mark(self, jti: str):
+        self.bloom.add(jti)
+        if self._marked_during_sync is not None:
+            self._marked_during_sync.add(jti)
+        verified_tokens.evict_where(lambda claims: claims.get('jti') == jti)
+
+    def _on_message(self, message: dict):
+        for jti in message.get('revoked', ()):
+            self._mark(jti)
+
+
+token_revocations = TokenRevocations(
+    revocation_store(), cache_bus,
+    capacity=RevocationConfig.bloom_capacity,
+    error_rate=RevocationConfig.bloom_error_rate,
+    sync_interval=RevocationConfig.sync_interval,
+)
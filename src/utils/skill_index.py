@@ -0,0 +1,63 @@
+from array import array
+from bisect import bisect_left, insort
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from src.config import SkillIndexConfig
+from src.utils.projection import ExecuterSkillsProjection, version_store
+from src.utils.unit_of_work import IUnitOfWork
+
+
+class SkillIndex(ExecuterSkillsProjection):
+
+    name = 'skill_index'
+
+    def __init__(self, enabled: bool, versions):
+        super().__init__(enabled, versions)
+        self._postings: Dict[str, array] = {}
+        self._skills_by_executer: Dict[int, Tuple[str, ...]] = {}
+
+    async def search(self, uow: IUnitOfWork, skills: List[str]) -> Optional[List[int]]:
+        if not await self.ensure_fresh(uow):
+            return None
+        return self._intersect(skills)
+
+    async def _build(self, batches: AsyncIterator[List[Tuple[int, dict]]]):
+        postings: Dict[str, array] = {}
+        skills_by_executer: Dict[int, Tuple[str, ...]] = {}
+        async for rows in batches:
+            for executer_id, skills in rows:
+                titles = tuple(skills or {})
+                skills_by_executer[executer_id] = titles
+                for title in titles:
+                    postings.setdefault(title, array('q')).append(executer_id)
+        self._postings, self._skills_by_executer = postings, skills_by_executer
+
+    def _intersect(self, skills: List[str]) -> List[int]:
+        postings = sorted((self._postings.get(title, array('q')) for title in set(skills)), key=len)
+        if not postings:
+            return []
+        result = list(postings[0])
+        for posting in postings[1:]:
+            if not result:
+                break
+            result = [executer_id for executer_id in result if self._contains(posting, executer_id)]
+        return result
+
+    def _patch(self, executer_id: int, skills: dict):
+        for title in self._skills_by_executer.pop(executer_id, ()):
+            posting = self._postings.get(title)
+            if posting is not None and self._contains(posting, executer_id):
+                del posting[bisect_left(posting, executer_id)]
+                if not posting:
+                    del self._postings[title]
+        if skills:
+            self._skills_by_executer[executer_id] = tuple(skills)
+            for title in skills:
+                insort(self._postings.setdefault(title, array('q')), executer_id)
+
+    @staticmethod
+    def _contains(posting: array, executer_id: int) -> bool:
+        i = bisect_left(posting, executer_id)
+        return i < len(posting) and posting[i] == executer_id
+
+
+skill_index = SkillIndex(SkillIndexConfig.enabled, version_store(SkillIndex.name))
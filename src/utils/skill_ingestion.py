@@ -0,0 +1,48 @@
+from collections import OrderedDict
+from typing import Dict, Iterable, List, Tuple
+from src.config import SkillIngestionConfig
+from src.utils.metrics import metrics
+
+
+class KnownSkills:
+    """Bounded LRU of skill title -> id this worker has seen committed, consulted before ``SkillsRepository.ensure``."""
+
+    def __init__(self, max_size: int):
+        self.max_size = max_size
+        self._ids: OrderedDict[str, int] = OrderedDict()
+
+    def resolve(self, titles: Iterable[str]) -> Tuple[Dict[str, int], List[str]]:
+        titles = list(titles)
+        unique = list(dict.fromkeys(titles))
+        known, unknown = {}, []
+        for title in unique:
+            skill_id = self._ids.get(title)
+            if skill_id is None:
+                unknown.append(title)
+            else:
+                self._ids.move_to_end(title)
+                known[title] = skill_id
+        metrics.inc('skills.ingestion.buffered', len(titles))
+        # repeated titles in one write and titles already known both skip the database
+        metrics.inc('skills.ingestion.deduped', len(titles) - len(unknown))
+        return known, unknown
+
+    def record_flush(self, flushed: int, created: int):
+        metrics.inc('skills.ingestion.flushed', flushed)
+        metrics.inc('skills.ingestion.created', created)
+        metrics.inc('skills.ingestion.existing', flushed - created)
+
+    def remember(self, ids: Dict[str, int]):
+        # only call after the transaction that resolved these ids committed, a rolled back insert leaves no row behind
+        for title, skill_id in ids.items():
+            self._ids[title] = skill_id
+            self._ids.move_to_end(title)
+        while len(self._ids) > self.max_size:
+            self._ids.popitem(last=False)
+
+    async def stats(self) -> dict:
+        return {'known': len(self._ids), 'max_size': self.max_size}
+
+
+known_skills = KnownSkills(SkillIngestionConfig.known_cache_size)
+metrics.register_collector('skill_ingestion', known_skills.stats)
@@ -1,32 +1,53 @@
-from typing import List
+from typing import Iterable
 from src.schemas.executer import SkillsSchema
-from src.models import Skills
+from src.models import Executer, Skills
 from src.connect import SyncSession
+from src.repository import SyncExecuterSkillsRepository, SyncSkillsRepository
 from loguru import logger
-from sqlalchemy.exc import IntegrityError
+from sqlalchemy import select
 
 class SkillsWorker:
+
+    @staticmethod
+    def create_skills(skills_data: Iterable[str]) -> dict:
+        titles = list(dict.fromkeys(title for title in skills_data if title))
+        with SyncSession() as session:
+            created_count = SyncSkillsRepository(session).upsert_many([{'title': title} for title in titles], ['title'])
+            session.commit()
+        skipped_count = len(titles) - created_count
+        logger.info(f'Skills created: {created_count}, skipped duplicates: {skipped_count}')
+        return {'created': created_count, 'skipped': skipped_count}
+
     @staticmethod
-    def create_skills(skills_data: dict): 
+    def backfill_executer_skills(batch_size: int = 500) -> int:
         with SyncSession() as session:
+            skills = SyncSkillsRepository(session)
+            executer_skills = SyncExecuterSkillsRepository(session)
+            last_id = 0
+            linked_count = 0
             created_count = 0
             skipped_count = 0
-            
-            for title, _ in skills_data.items(): 
-                logger.info(f"Creating skill: {title}")
-                skill_obj = Skills()
-                skill_obj.title = title  
-                
-                try:
-                    session.add(skill_obj)
-                    session.flush() 
-                    created_count += 1
-                except IntegrityError as e:
-                    session.rollback()
-                    logger.warning(f"Skill '{title}' already exists, skipping")
-                    skipped_count += 1
-                except Exception as e:
-                    logger.exception(f"Error adding skill {title}: {e}")
-            
-            session.commit()
-            logger.info(f'Skills created: {created_count}, skipped duplicates: {skipped_count}')
\ No newline at end of file
+            while True:
+                stmt = select(Executer).where(Executer.id > last_id).order_by(Executer.id).limit(batch_size)
+                executers = session.execute(stmt).scalars().all()
+                if not executers:
+                    break
+                titles = list({title for executer in executers for title in (executer.skills or {})})
+                if titles:
+                    created = skills.upsert_many([{'title': title} for title in titles], ['title'])
+                    created_count += created
+                    skipped_count += len(titles) - created
+                    skill_ids = dict(session.execute(select(Skills.title, Skills.id).where(Skills.title.in_(titles))).tuples().all())
+                    rows = [
+                        {'executer_id': executer.id, 'skill_id': skill_ids[title], 'experience': experience}
+                        for executer in executers
+                        for title, experience in (executer.skills or {}).items()
+                    ]
+                    executer_skills.upsert_many(rows, ['executer_id', 'skill_id'])
+                    linked_count += len(rows)
+                session.commit()
+                last_id = executers[-1].id
+                logger.info(f'Backfilled executer_skills up to executer id={last_id}')
+            logger.info(f'executer_skills backfill finished: {linked_count} links processed, '
+                        f'skills created: {created_count}, skipped duplicates: {skipped_count}')
+            return linked_count
@@ -1,28 +1,200 @@
+import os
 import smtplib
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
+from typing import Deque, Iterator, List, Optional, Tuple
 from src.config import SMTPConfig
 from loguru import logger
 
-class SMTPClient(SMTPConfig):
 
-    def send_email(self, to_email: str, subject: str, message: str):
-        msg = MIMEMultipart()
-        msg['From'] = self.smtp_user
-        msg['To'] = to_email
-        msg['subject'] = subject
-        msg.attach(MIMEText(message, 'html'))
+class PooledSMTPConnection:
+
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.created_at = time.monotonic()
+        self.last_used_at = self.created_at
+        self.sent = 0
+
 
-        server = smtplib.SMTP(self.smtp_host, self.smtp_port, local_hostname='localhost')
+class SMTPConnectionPool:
 
-        if self.smtp_use_tls:
+    def __init__(self, host: str, port: int, user: str, password: str, use_tls: bool,
+                 size: int, max_messages: int, max_age: float, health_check_after: float, timeout: float):
+        self.host = host
+        self.port = port
+        self.user = user
+        self.password = password
+        self.use_tls = use_tls
+        self.size = size
+        self.max_messages = max_messages
+        self.max_age = max_age
+        self.health_check_after = health_check_after
+        self.timeout = timeout
+        self._reset()
+
+    @contextmanager
+    def connection(self) -> Iterator[PooledSMTPConnection]:
+        self._check_fork()
+        with self._slots:
+            conn = self._checkout()
+            try:
+                yield conn
+            except (smtplib.SMTPServerDisconnected, smtplib.SMTPResponseException, OSError):
+                self._discard(conn)
+                raise
+            except Exception:
+                self._checkin(conn)
+                raise
+            else:
+                self._checkin(conn)
+
+    def close(self):
+        with self._lock:
+            idle, self._idle = list(self._idle), deque()
+        for conn in idle:
+            self._discard(conn)
+
+    def _checkout(self) -> PooledSMTPConnection:
+        while True:
+            with self._lock:
+                conn = self._idle.pop() if self._idle else None
+            if conn is None:
+                return self._connect()
+            if self._expired(conn):
+                self._discard(conn)
+            elif time.monotonic() - conn.last_used_at >= self.health_check_after and not self._healthy(conn):
+                logger.debug("SMTP connection failed NOOP health check, reconnecting")
+                self._discard(conn)
+            else:
+                return conn
+
+    def _checkin(self, conn: PooledSMTPConnection):
+        conn.last_used_at = time.monotonic()
+        if self._expired(conn):
+            self._discard(conn)
+            return
+        with self._lock:
+            self._idle.append(conn)
+
+    def _connect(self) -> PooledSMTPConnection:
+        server = smtplib.SMTP(self.host, self.port, local_hostname='localhost', timeout=self.timeout)
+        if self.use_tls:
             server.starttls()
+        server.login(self.user, self.password)
+        logger.debug(f"Opened SMTP connection to {self.host}:{self.port}")
+        return PooledSMTPConnection(server)
+
+    def _expired(self, conn: PooledSMTPConnection) -> bool:
+        return conn.sent >= self.max_messages or time.monotonic() - conn.created_at >= self.max_age
+
+    @staticmethod
+    def _healthy(conn: PooledSMTPConnection) -> bool:
+        try:
+            return conn.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+
+    @staticmethod
+    def _discard(conn: PooledSMTPConnection):
+        try:
+            conn.server.quit()
+        except (smtplib.SMTPException, OSError):
+            conn.server.close()
 
-        server.login(self.smtp_user, self.smtp_pass)
-        server.sendmail(self.smtp_user, to_email, msg.as_string())
+    def _check_fork(self):
+        # sockets must not be shared between prefork Celery worker processes
+        if self._pid != os.getpid():
+            self._reset()
+
+    def _reset(self):
+        self._pid = os.getpid()
+        self._lock = threading.Lock()
+        self._slots = threading.BoundedSemaphore(self.size)
+        self._idle: Deque[PooledSMTPConnection] = deque()
+
+
+smtp_pool = SMTPConnectionPool(
+    SMTPConfig.smtp_host, SMTPConfig.smtp_port, SMTPConfig.smtp_user, SMTPConfig.smtp_pass, SMTPConfig.smtp_use_tls,
+    size=SMTPConfig.smtp_pool_size,
+    max_messages=SMTPConfig.smtp_max_messages,
+    max_age=SMTPConfig.smtp_max_age,
+    health_check_after=SMTPConfig.smtp_health_check_after,
+    timeout=SMTPConfig.smtp_timeout,
+)
+
+
+class SMTPClient(SMTPConfig):
+
+    def __init__(self, pool: Optional[SMTPConnectionPool] = None):
+        self.pool = pool or smtp_pool
+
+    def send_email(self, to_email: str, subject: str, message: str):
+        msg = self._build(to_email, subject, message)
+
+        try:
+            self._send(to_email, msg)
+        except smtplib.SMTPServerDisconnected:
+            # the pooled session died between the health check and the send, retry once on a fresh one
+            logger.warning(f'SMTP connection dropped while sending to {to_email}, reconnecting')
+            self._send(to_email, msg)
         logger.info(f'Sended email to {to_email}')
-        server.quit()
 
-        return True 
+        return True
+
+    def send_many(self, messages: List[Tuple[str, str, str]]) -> List[Optional[str]]:
+        """Stream (to_email, subject, html) messages over one pooled session.
+
+        Returns an error per message in input order, None for delivered ones. A recipient the server
+        refuses does not abort the batch; a dropped session is reopened and the interrupted message
+        retried once.
+        """
+        errors: List[Optional[str]] = [None] * len(messages)
+        pending: Deque[int] = deque(range(len(messages)))
+        retried = set()
+        while pending:
+            current = None
+            try:
+                with self.pool.connection() as conn:
+                    # hand the session back once it hits the per-connection message cap so it gets recycled
+                    while pending and conn.sent < self.pool.max_messages:
+                        current = pending[0]
+                        to_email, subject, message = messages[current]
+                        try:
+                            conn.server.sendmail(self.pool.user, to_email, self._build(to_email, subject, message).as_string())
+                        except (smtplib.SMTPRecipientsRefused, smtplib.SMTPSenderRefused, smtplib.SMTPDataError) as e:
+                            errors[current] = str(e)
+                        conn.sent += 1
+                        pending.popleft()
+                        current = None
+            except (smtplib.SMTPException, OSError) as e:
+                error = str(e) or type(e).__name__
+                if current is None:
+                    # the session could not be opened, nothing left in the batch can be delivered
+                    for i in pending:
+                        errors[i] = error
+                    pending.clear()
+                elif current in retried:
+                    errors[pending.popleft()] = error
+                else:
+                    logger.warning(f'SMTP connection dropped while sending to {messages[current][0]}, reconnecting')
+                    retried.add(current)
+        sent = errors.count(None)
+        logger.info(f'Sended {sent}/{len(messages)} emails in batch')
+        return errors
 
+    def _build(self, to_email: str, subject: str, message: str) -> MIMEMultipart:
+        msg = MIMEMultipart()
+        msg['From'] = self.pool.user
+        msg['To'] = to_email
+        msg['subject'] = subject
+        msg.attach(MIMEText(message, 'html'))
+        return msg
 
+    def _send(self, to_email: str, msg: MIMEMultipart):
+        with self.pool.connection() as conn:
+            conn.server.sendmail(self.pool.user, to_email, msg.as_string())
+            conn.sent += 1
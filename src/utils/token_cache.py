@@ -0,0 +1,60 @@
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Callable, Optional
+from src.config import SecurityConfig
+from src.utils.metrics import metrics
+
+
+class VerifiedTokenCache:
+
+    def __init__(self, max_entries: int):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._claims: OrderedDict[bytes, dict] = OrderedDict()
+
+    def get(self, token: str) -> Optional[dict]:
+        digest = self._digest(token)
+        claims = self._claims.get(digest)
+        if claims is None or claims['exp'] <= time.time():
+            if claims is not None:
+                del self._claims[digest]
+            self.misses += 1
+            metrics.inc('auth.token_cache.miss')
+            return None
+        self._claims.move_to_end(digest)
+        self.hits += 1
+        metrics.inc('auth.token_cache.hit')
+        # callers get their own copy, the cached claims must stay as verified
+        return dict(claims)
+
+    def put(self, token: str, claims: dict):
+        if not isinstance(claims.get('exp'), (int, float)):
+            return
+        self._claims[self._digest(token)] = dict(claims)
+        if len(self._claims) > self.max_entries:
+            self._claims.popitem(last=False)
+
+    def evict(self, token: str):
+        self._claims.pop(self._digest(token), None)
+
+    def evict_where(self, predicate: Callable[[dict], bool]) -> int:
+        stale = [digest for digest, claims in self._claims.items() if predicate(claims)]
+        for digest in stale:
+            del self._claims[digest]
+        return len(stale)
+
+    async def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {'entries': len(self._claims), 'hits': self.hits, 'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else None}
+
+    @staticmethod
+    def _digest(token: str) -> bytes:
+        # never keep raw bearer tokens in memory longer than the request
+        return hashlib.blake2b(token.encode(), digest_size=16).digest()
+
+
+verified_tokens = VerifiedTokenCache(SecurityConfig.token_cache_size)
+metrics.register_collector('token_cache', verified_tokens.stats)
@@ -1,15 +1,25 @@
 from abc import ABC, abstractmethod
 from typing import Type
 from src.repository import *
+from sqlalchemy.exc import InterfaceError, OperationalError
 from src.connect import async_session_maker 
+from loguru import logger
+from src.utils.cache_tags import tag_invalidator
+from src.utils.loader import BatchLoader
+from src.schemas.user import UserContactSchema
+from src.utils.replicas import replica_router, request_scopes
 
 class IUnitOfWork(ABC):
 
+    read_only: bool = False
     users: UserRepository
     services: ServicesRepository
     categories: CategoriesRepository
     executers: ExecuterRepository
     skills: SkillsRepository
+    executer_skills: ExecuterSkillsRepository
+    outbox: OutboxRepository
+    user_loader: BatchLoader
 
     @abstractmethod
     async def __aenter__(self):
@@ -26,30 +36,101 @@ class IUnitOfWork(ABC):
     @abstractmethod
     async def rollback(self):
         return NotImplementedError
+
+    @abstractmethod
+    def invalidate(self, *tags: str):
+        return NotImplementedError
     
 
 class UnitOfWork(IUnitOfWork):
 
+    # built on first access, most requests touch one or two of these and cache hits touch none
+    repositories = {
+        'users': UserRepository,
+        'services': ServicesRepository,
+        'categories': CategoriesRepository,
+        'executers': ExecuterRepository,
+        'skills': SkillsRepository,
+        'executer_skills': ExecuterSkillsRepository,
+        'outbox': OutboxRepository,
+    }
+    # loaders are shared by every caller in the unit of work, so they load the public columns only
+    loaders = {
+        'user_loader': ('users', UserContactSchema),
+    }
+
     def __init__(self):
         self.session_factory = async_session_maker
+        self._session = None
+        self._invalidated = set()
+        self._depth = 0
+        self.replica = None
+
+    @property
+    def session(self):
+        # the pool connection itself is only checked out by the session's first statement
+        if self._session is None:
+            self.replica = replica_router.choose() if self.read_only else None
+            factory = self.replica.session_maker if self.replica else self.session_factory
+            self._session = factory(autoflush=not self.read_only)
+        return self._session
+
+    def __getattr__(self, name):
+        if name in self.repositories:
+            value = self.repositories[name](self.session)
+        elif name in self.loaders:
+            repository, schema = self.loaders[name]
+            value = BatchLoader(getattr(self, repository), schema=schema)
+        else:
+            raise AttributeError(f"{type(self).__name__!r} object has no attribute {name!r}")
+        setattr(self, name, value)
+        return value
 
     async def __aenter__(self):
-        self.session = self.session_factory()
-        self.users = UserRepository(self.session)
-        self.services = ServicesRepository(self.session)
-        self.categories = CategoriesRepository(self.session)
-        self.executers = ExecuterRepository(self.session)
-        self.skills = SkillsRepository(self.session)
-        
+        # re-entrant: a service helper may open the same unit of work its caller already holds
+        if self._depth == 0:
+            self._session = None
+            self.replica = None
+            for name in (*self.repositories, *self.loaders):
+                self.__dict__.pop(name, None)
+        self._depth += 1
         return self
     
     async def __aexit__(self, exc_type, exc_val, exc_tb):
-        if exc_type:
-            await self.session.rollback()
-        await self.session.close()
+        self._depth -= 1
+        if self._depth or self._session is None:
+            return
+        if exc_type and not self.read_only:
+            await self._session.rollback()
+        if self.replica and exc_type and issubclass(exc_type, (InterfaceError, OperationalError)):
+            replica_router.mark_failed(self.replica)
+        await self._session.close()
+        self._session = None
 
     async def commit(self):
-        await self.session.commit()
+        if self.read_only:
+            raise RuntimeError("commit() called on a read-only unit of work")
+        if self._session is not None:
+            await self._session.commit()
+            # the writer's next reads and the routes cached under these tags must not hit a lagging replica
+            await replica_router.mark_written(request_scopes.get() | self._invalidated)
+        if self._invalidated:
+            tags, self._invalidated = self._invalidated, set()
+            await tag_invalidator.invalidate(tags)
 
     async def rollback(self):
-        await self.session.rollback()
\ No newline at end of file
+        if self._session is not None and not self.read_only:
+            await self._session.rollback()
+        self._invalidated.clear()
+
+    def invalidate(self, *tags: str):
+        if self.read_only:
+            raise RuntimeError("invalidate() called on a read-only unit of work")
+        # applied once the transaction commits, so readers never re-cache the old rows
+        self._invalidated.update(tags)
+
+
+class ReadOnlyUnitOfWork(UnitOfWork):
+
+    # nothing is flushed or committed, closing the session releases the connection as is
+    read_only = True
@@ -1,6 +1,6 @@
 from typing import List
 from src.schemas.executer import SkillsSchema
-from src.config import celery, render_email
+from src.config import OutboxConfig, celery, render_email, render_email_batch
 from src.utils.smtp import SMTPClient
 from src.utils.skills_worker import SkillsWorker
 from loguru import logger
@@ -12,10 +12,34 @@ def send_welcome_email_task(to_email, username: str, action_url: str):
     return True
 
 @celery.task
-def create_skills_task(skills_data: dict):
-    logger.info(f'{skills_data}')
-    SkillsWorker.create_skills(skills_data)
-    logger.info('Skills created successfully')
-    return True
+def send_welcome_emails_task(recipients: List[dict], attempt: int = 0):
+    # recipients are send_welcome_email_task kwargs: to_email, username, action_url
+    htmls = render_email_batch('welcome.html', [
+        {'username': r['username'], 'action_url': r['action_url']} for r in recipients
+    ])
+    errors = SMTPClient().send_many([(r['to_email'], 'Welcome', html) for r, html in zip(recipients, htmls)])
+    failed = [{**r, 'error': error} for r, error in zip(recipients, errors) if error]
+    report = {'sent': [r['to_email'] for r, error in zip(recipients, errors) if not error], 'failed': failed}
+    if failed:
+        # a new task for the failed subset instead of self.retry, which raises and would drop this report
+        if attempt < OutboxConfig.batch_max_retries:
+            retry = [{key: value for key, value in r.items() if key != 'error'} for r in failed]
+            send_welcome_emails_task.apply_async(args=[retry], kwargs={'attempt': attempt + 1}, countdown=OutboxConfig.batch_retry_delay)
+        else:
+            logger.error(f'Giving up on {len(failed)} welcome emails: {[r["to_email"] for r in failed]}')
+    return report
+
+# outbox messages of a key task are relayed as one call of the value task with their payloads as a list
+BATCH_TASKS = {
+    send_welcome_email_task.name: send_welcome_emails_task.name,
+}
 
-    
+@celery.task
+def create_skills_task(skills_data: list):
+    # bulk import of skill titles, one INSERT ... ON CONFLICT DO NOTHING per chunk
+    logger.info(f'Creating {len(skills_data)} skills')
+    return SkillsWorker.create_skills(skills_data)
+
+@celery.task
+def backfill_executer_skills_task(batch_size: int = 500):
+    return SkillsWorker.backfill_executer_skills(batch_size)
@@ -0,0 +1,22 @@
+import os
+import tempfile
+
+# configuration is read at import time, point everything at a throwaway SQLite file and in-process backends
+_db = os.path.join(tempfile.mkdtemp(), 'test.db')
+os.environ.setdefault('DATABASE_URL', f'sqlite+aiosqlite:///{_db}')
+os.environ.setdefault('SYNC_DATABASE_URL', f'sqlite:///{_db}')
+for name in ('CACHE_TAG_BACKEND', 'PROJECTION_VERSION_BACKEND', 'REVOCATION_BACKEND'):
+    os.environ.setdefault(name, 'local')
+os.environ.setdefault('OUTBOX_RELAY_ENABLED', '0')
+
+import pytest
+from src.connect import sync_engine
+from src.utils.models import Base
+import src.models  # noqa: F401  registers every table on Base.metadata
+
+
+@pytest.fixture(autouse=True)
+def database():
+    Base.metadata.create_all(sync_engine)
+    yield
+    Base.metadata.drop_all(sync_engine)
@@ -0,0 +1,65 @@
+import pytest
+from fastapi import HTTPException
+from src.schemas.categories import CategoryCreateSchema
+from src.service.categories import CategoriesService
+from src.utils.cache_tags import cache_tags, tag_invalidator
+from src.utils.unit_of_work import UnitOfWork
+
+
+async def create_category(title: str) -> int:
+    async with UnitOfWork() as uow:
+        category = await uow.categories.add(CategoryCreateSchema(title=title, description='d'))
+        await uow.commit()
+    return category.id
+
+
+@pytest.mark.asyncio
+async def test_delete_then_read():
+    category_id = await create_category('design')
+
+    assert await CategoriesService().delete_category(category_id, UnitOfWork()) == {'status': 'success'}
+
+    with pytest.raises(HTTPException) as error:
+        await CategoriesService().get_category(category_id, UnitOfWork())
+    assert error.value.status_code == 404
+    # the delete released its connection, so the next write is not blocked on the database lock
+    await create_category('writing')
+
+
+@pytest.mark.asyncio
+async def test_nested_unit_of_work_commits_on_the_outer_session():
+    category_id = await create_category('design')
+    uow = UnitOfWork()
+    async with uow:
+        async with uow:
+            category = await uow.categories.get(id=category_id)
+        await uow.categories.remove(category)
+        await uow.commit()
+    assert uow._session is None
+
+    async with UnitOfWork() as uow:
+        assert await uow.categories.get(id=category_id) is None
+
+
+class UnavailableTagStore:
+
+    async def invalidate(self, tags):
+        raise ConnectionError('tag store down')
+
+
+@pytest.mark.asyncio
+async def test_failed_tag_invalidation_is_replayed(monkeypatch):
+    monkeypatch.setattr(tag_invalidator, 'versions', UnavailableTagStore())
+    monkeypatch.setattr(tag_invalidator, 'retry_delay', 0)
+    before = (await cache_tags.get_many(['categories']))[0]
+    async with UnitOfWork() as uow:
+        await uow.categories.add(CategoryCreateSchema(title='design', description='d'))
+        uow.invalidate('categories')
+        await uow.commit()
+    # the write committed but its tag could not be bumped, cached reads of it must be skipped until it is
+    assert tag_invalidator.is_pending(['categories'])
+
+    monkeypatch.setattr(tag_invalidator, 'versions', cache_tags)
+    assert await tag_invalidator.replay()
+    assert not tag_invalidator.is_pending(['categories'])
+    assert (await cache_tags.get_many(['categories']))[0] == before + 1